@@ -0,0 +1,130 @@
+import argparse
+import json
+
+import boto3
+import pandas as pd
+
+# ========================================================
+# Run Ledger Aggregation
+# ========================================================
+# Each pipeline stage writes a ledger entry to run-ledgers/<correlation_id>/ for every file it processes.
+# This script turns the entries into p50/p95/p99 stage and queue latencies and throughput per dataset prefix.
+#
+# Usage: python aggregate_run_ledgers.py --bucket derrick-dp-bucket [--output stage_latencies.csv]
+
+PERCENTILES = [0.5, 0.95, 0.99]
+# Stages that start a new run of a file that already went through the pipeline (the loads they trigger reuse its correlation ID)
+RERUN_STAGES = ["revalidate_data_element", "reprocess_data_element"]
+
+def fetch_ledger_entries(s3, bucket_name: str, ledger_folder: str = "run-ledgers/"):
+    """
+    Fetches every run ledger entry from an S3 bucket.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        ledger_folder (str, optional): The folder where run ledgers are saved. Defaults to "run-ledgers/".
+
+    Returns:
+        pandas.DataFrame: One row per ledger entry.
+    """
+    entries = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=ledger_folder):
+        for obj in page.get("Contents", []):
+            if obj["Key"].endswith(".json"):
+                response = s3.get_object(Bucket=bucket_name, Key=obj["Key"])
+                entries.append(json.loads(response["Body"].read().decode("utf-8")))
+    df = pd.DataFrame(entries)
+    for column in ["landed_at", "started_at", "ended_at"]:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], utc=True, format="ISO8601")
+    return df
+
+def build_segments(entries):
+    """
+    Splits each file's journey into stage segments (time spent in a Lambda) and queue segments (time waiting
+    between the end of one stage and the start of the next).
+    A file is processed in runs - the first run starts when the file lands, re-validation and reprocessing each start
+    a new run. Queue and end to end times are measured within a run, so a reload days later is not counted as queueing.
+
+    Args:
+        entries (pandas.DataFrame): The ledger entries, as returned by fetch_ledger_entries.
+
+    Returns:
+        pandas.DataFrame: One row per segment with the dataset prefix, segment name, seconds, rows and bytes.
+    """
+    entries = entries.sort_values(["correlation_id", "started_at"]).reset_index(drop=True)
+    is_rerun = entries["stage"].isin(RERUN_STAGES)
+    entries["run"] = is_rerun.astype(int).groupby(entries["correlation_id"]).cumsum()
+    runs = entries.groupby(["correlation_id", "run"])
+    # A run starts at landing, or at the start of the re-validation/reprocessing stage that opened it
+    run_stage = runs["stage"].transform("first").where(entries["run"] > 0)
+    run_start = runs["started_at"].transform("first").where(entries["run"] > 0, entries["landed_at"])
+    # The first stage of a landing run queued since landing, the stage opening a rerun did not queue
+    previous_end = runs["ended_at"].shift(1)
+    previous_end = previous_end.where(previous_end.notna() | is_rerun, entries["landed_at"])
+
+    stages = pd.DataFrame({
+        "dataset_name_prefix": entries["dataset_name_prefix"],
+        "segment": entries["stage"],
+        "seconds": entries["duration_ms"] / 1000,
+        "row_count": entries["row_count"],
+        "byte_count": entries["byte_count"]
+    })
+    queues = pd.DataFrame({
+        "dataset_name_prefix": entries["dataset_name_prefix"],
+        "segment": "queue_before_" + entries["stage"],
+        "seconds": (entries["started_at"] - previous_end).dt.total_seconds()
+    }).dropna(subset=["seconds"])
+
+    # End to end - from the start of a run to the end of its first load, for runs that reached the warehouse
+    loaded = entries[(entries["stage"] == "insert_data_into_redshift") & (entries["status_code"] == 200)]
+    loaded = loaded.groupby(["correlation_id", "run"]).head(1)
+    end_to_end = pd.DataFrame({
+        "dataset_name_prefix": loaded["dataset_name_prefix"],
+        "segment": ("end_to_end_after_" + run_stage[loaded.index]).fillna("end_to_end"),
+        "seconds": (loaded["ended_at"] - run_start[loaded.index]).dt.total_seconds()
+    })
+    return pd.concat([stages, queues, end_to_end], ignore_index=True)
+
+def summarize_segments(segments):
+    """
+    Computes latency percentiles and throughput per dataset prefix and segment.
+
+    Args:
+        segments (pandas.DataFrame): The segments, as returned by build_segments.
+
+    Returns:
+        pandas.DataFrame: Count, p50/p95/p99 seconds, rows per second and MB per second per dataset prefix and segment.
+    """
+    grouped = segments.groupby(["dataset_name_prefix", "segment"])
+    summary = grouped["seconds"].quantile(PERCENTILES).unstack()
+    summary.columns = [f"p{int(percentile * 100)}_seconds" for percentile in summary.columns]
+    summary.insert(0, "file_count", grouped["seconds"].count())
+
+    # Throughput only applies to stages - queue and end to end segments carry no volumes
+    total_seconds = grouped["seconds"].sum()
+    summary["rows_per_second"] = (grouped["row_count"].sum(min_count=1) / total_seconds).round(1)
+    summary["mb_per_second"] = (grouped["byte_count"].sum(min_count=1) / 1_000_000 / total_seconds).round(3)
+    return summary.reset_index()
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate pipeline run ledgers into stage latencies and throughput.")
+    parser.add_argument("--bucket", required=True, help="Name of the pipeline S3 bucket.")
+    parser.add_argument("--ledger-folder", default="run-ledgers/", help="Folder where run ledgers are saved.")
+    parser.add_argument("--output", help="Optional path of a .csv file to save the summary to.")
+    args = parser.parse_args()
+
+    entries = fetch_ledger_entries(boto3.client('s3'), args.bucket, args.ledger_folder)
+    if entries.empty:
+        print(f"No run ledger entries found in '{args.bucket}/{args.ledger_folder}'.")
+        return
+    summary = summarize_segments(build_segments(entries))
+    print(summary.to_string(index=False))
+    if args.output:
+        summary.to_csv(args.output, index=False)
+        print(f"Summary saved to '{args.output}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from aggregate_run_ledgers import build_segments, summarize_segments
+
+LANDED_AT = "2024-05-01T00:00:00+00:00"
+
+def ledger_entry(correlation_id, stage, started_at, seconds, status_code=200, row_count=1000, byte_count=2_000_000):
+    started_at = pd.Timestamp(started_at)
+    return {
+        "correlation_id": correlation_id,
+        "landed_at": pd.Timestamp(LANDED_AT),
+        "dataset_name_prefix": "MOE",
+        "stage": stage,
+        "started_at": started_at,
+        "ended_at": started_at + pd.Timedelta(seconds=seconds),
+        "duration_ms": seconds * 1000,
+        "row_count": row_count,
+        "byte_count": byte_count,
+        "status_code": status_code
+    }
+
+@pytest.fixture
+def entries():
+    """One file through the pipeline, reprocessed three days later (which reloads it under the same correlation ID)."""
+    return pd.DataFrame([
+        ledger_entry("a", "validate_file", "2024-05-01T00:00:10+00:00", 5),
+        ledger_entry("a", "validate_data_element", "2024-05-01T00:00:20+00:00", 10, status_code=201),
+        ledger_entry("a", "insert_data_into_redshift", "2024-05-01T00:00:40+00:00", 20),
+        ledger_entry("a", "reprocess_data_element", "2024-05-04T00:00:00+00:00", 4, row_count=10),
+        ledger_entry("a", "insert_data_into_redshift", "2024-05-04T00:00:06+00:00", 20),
+    ]).sample(frac=1, random_state=0)
+
+def get_seconds(segments, segment):
+    return segments.loc[segments["segment"] == segment, "seconds"].tolist()
+
+def test_build_segments_measures_queues_within_each_run(entries):
+    segments = build_segments(entries)
+    assert get_seconds(segments, "queue_before_validate_file") == [10]
+    assert get_seconds(segments, "queue_before_validate_data_element") == [5]
+    # Second load queues behind the reprocessing, not behind the first load three days earlier
+    assert get_seconds(segments, "queue_before_insert_data_into_redshift") == [10, 2]
+    assert get_seconds(segments, "queue_before_reprocess_data_element") == []
+
+def test_build_segments_measures_end_to_end_per_run(entries):
+    segments = build_segments(entries)
+    assert get_seconds(segments, "end_to_end") == [60]
+    assert get_seconds(segments, "end_to_end_after_reprocess_data_element") == [26]
+
+def test_build_segments_only_counts_first_successful_load_of_a_run(entries):
+    extra = pd.DataFrame([
+        ledger_entry("b", "validate_data_element", "2024-05-01T00:01:00+00:00", 10),
+        ledger_entry("b", "insert_data_into_redshift", "2024-05-01T00:02:00+00:00", 20, status_code=500),
+        ledger_entry("b", "insert_data_into_redshift", "2024-05-01T00:03:00+00:00", 20),
+        ledger_entry("b", "insert_data_into_redshift", "2024-05-01T00:04:00+00:00", 20),
+    ])
+    segments = build_segments(pd.concat([entries, extra]))
+    assert sorted(get_seconds(segments, "end_to_end")) == [60, 200]
+
+def test_summarize_segments(entries):
+    summary = summarize_segments(build_segments(entries)).set_index("segment")
+    insert = summary.loc["insert_data_into_redshift"]
+    assert insert["file_count"] == 2
+    assert insert["p50_seconds"] == 20
+    assert insert["rows_per_second"] == 50.0
+    assert insert["mb_per_second"] == 0.1
+    end_to_end = summary.loc["end_to_end"]
+    assert end_to_end["file_count"] == 1 and end_to_end["p99_seconds"] == 60
+    assert pd.isna(end_to_end["rows_per_second"])
@@ -0,0 +1,44 @@
+-- Redshift Spectrum external tables over the data element validated zone.
+-- Tables loaded in "external" mode (see table_load_modes in the insert_data_into_redshift Lambda) are queried
+-- in place from S3 - the Lambda only registers each file's dataset/load_date partition.
+-- Replace <bucket_name> and <redshift_iam_role_arn> before running. Run before create_lambda_user.sql, which grants
+-- the Lambda user access to these tables.
+
+-- 1. Create External Schema (if not exists) backed by the Glue Data Catalog
+CREATE EXTERNAL SCHEMA IF NOT EXISTS sm_covid_recovery_external
+FROM DATA CATALOG
+DATABASE 'sm_covid_recovery_external'
+IAM_ROLE '<redshift_iam_role_arn>'
+CREATE EXTERNAL DATABASE IF NOT EXISTS;
+
+-- 2. Create MOM Workforce External Table in the created schema
+CREATE EXTERNAL TABLE sm_covid_recovery_external.bt_mom_workforce (
+    nric CHAR(9),
+    race VARCHAR(100),
+    employment_status VARCHAR(100),
+    sector VARCHAR(100),
+    salary DECIMAL(10,2)
+)
+PARTITIONED BY (dataset VARCHAR(10), load_date DATE)
+ROW FORMAT SERDE 'org.apache.hadoop.hive.serde2.OpenCSVSerde'
+STORED AS TEXTFILE
+LOCATION 's3://<bucket_name>/3-data-element-validated-zone/'
+TABLE PROPERTIES ('skip.header.line.count'='1');
+
+-- 3. Create MOE Primary School Students External Table in the created schema
+CREATE EXTERNAL TABLE sm_covid_recovery_external.bt_moe_primary_school_students (
+    nric CHAR(9),
+    primary_school VARCHAR(100),
+    level INT,
+    absences INT,
+    cca VARCHAR(100),
+    english_grade INT,
+    mathematics_grade INT,
+    science_grade INT,
+    mtl_grade INT
+)
+PARTITIONED BY (dataset VARCHAR(10), load_date DATE)
+ROW FORMAT SERDE 'org.apache.hadoop.hive.serde2.OpenCSVSerde'
+STORED AS TEXTFILE
+LOCATION 's3://<bucket_name>/3-data-element-validated-zone/'
+TABLE PROPERTIES ('skip.header.line.count'='1');
@@ -1,3 +1,6 @@
+-- Run order: create_schema_table.sql, create_external_schema_table.sql, then this file
+-- (the grants below need both the internal and the external schema and tables to exist)
+
 -- Create User for Lambda Function to execute statements
 CREATE USER lambda_user WITH PASSWORD 'Password1';
 
@@ -8,4 +11,11 @@ GRANT USAGE ON SCHEMA sm_covid_recovery TO lambda_user;
 GRANT ALL PRIVILEGES ON sm_covid_recovery.bt_mom_workforce TO lambda_user;
 
 -- Grant permissions on the MOE table to the user
-GRANT ALL PRIVILEGES ON sm_covid_recovery.bt_moe_primary_school_students TO lambda_user;
\ No newline at end of file
+GRANT ALL PRIVILEGES ON sm_covid_recovery.bt_moe_primary_school_students TO lambda_user;
+
+-- Grant USAGE on the external schema to the user (tables loaded in "external" mode)
+GRANT USAGE ON SCHEMA sm_covid_recovery_external TO lambda_user;
+
+-- Allow the user to register partitions on the external tables (ALTER TABLE requires ownership)
+ALTER TABLE sm_covid_recovery_external.bt_mom_workforce OWNER TO lambda_user;
+ALTER TABLE sm_covid_recovery_external.bt_moe_primary_school_students OWNER TO lambda_user;
@@ -5,18 +5,38 @@ from utility_function import *
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
-# Initialize the Redshift Data API client
+# Initialize the Redshift Data API and S3 clients
 client = boto3.client('redshift-data', region_name='ap-southeast-1')  # Ensure correct region
+s3 = boto3.client('s3')
 
 # Redshift Serverless configuration
 redshift_workgroup_name = os.environ['redshift_workgroup_name']
 database_name = 'dev'
 iam_role_arn = os.environ['iam_role_arn']
+external_schema_name = "sm_covid_recovery_external"
+run_ledger_folder_name = "run-ledgers/"
+load_marker_folder_name = "load-markers/"
+
+# Load mode per table - "copy" loads each file into the internal table, "external" only registers the file's
+# partition on the Redshift Spectrum external table (see sql_queries/create_external_schema_table.sql).
+# The two modes differ in meaning: "copy" truncates the table so it only holds the newest file, while an external
+# table accumulates every file ever loaded across its partitions - queries on it should filter on dataset/load_date
+# to read the newest drop only.
+table_load_modes = {
+    "bt_mom_workforce": "copy",
+    "bt_moe_primary_school_students": "copy"
+}
 
 def lambda_handler(event, context):
+    started_at = datetime.now(timezone.utc)
+    file_metadata = None
     try:
         # Extract the file name from the event (from S3)
         bucket_name, key = extract_bucket_and_key(event)
+        # Reprocessed rows trigger a reload of their validated file - COPY loads the validated file and its reprocessed rows by key prefix
+        key = get_load_key(key)
+        # Correlation ID assigned at landing is read from the object metadata
+        file_metadata, byte_count = get_file_metadata(s3, bucket_name, key)
 
         # Determine the table name based on the file name
         schema_name = "sm_covid_recovery"
@@ -24,6 +44,40 @@ def lambda_handler(event, context):
         if table_name is None:
             print(f"No table name set for current dataset '{bucket_name}/{key}'.")
 
+        # Read the column statistics sidecar produced during validation instead of profiling the table after loading
+        column_statistics = fetch_column_statistics_from_s3(s3, bucket_name, key)
+        expected_row_count = column_statistics["row_count"] if column_statistics else None
+        if column_statistics:
+            print(f"Column statistics for '{bucket_name}/{key}': {expected_row_count} rows, "
+                  f"null rates {({column: stats['null_rate'] for column, stats in column_statistics['columns'].items()})}.")
+
+        if table_load_modes.get(table_name, "copy") == "external":
+            # Query the validated files in place - register the partition instead of copying the data
+            partition_query = build_add_partition_query(external_schema_name, table_name, bucket_name, key)
+            print(f"Executing SQL partition query: {partition_query}")
+
+            secret_arn = os.environ['secret_arn']
+            execute_redshift_query(partition_query, client, redshift_workgroup_name, database_name, secret_arn)
+            record_stage_in_run_ledger(s3, bucket_name, file_metadata, "insert_data_into_redshift", key, started_at, expected_row_count, byte_count, 200,
+                                       run_ledger_folder_name)
+
+            return {
+                "statusCode": 200,
+                "body": f"File content from {bucket_name}/{key} registered on {external_schema_name}.{table_name} successfully.",
+                "expected_row_count": expected_row_count
+            }
+
+        # The table is replaced by each load - skip files older than the one it already holds (e.g. re-validated past drops)
+        load_marker = fetch_load_marker(s3, bucket_name, table_name, load_marker_folder_name)
+        if is_superseded(load_marker, key, file_metadata["landed-at"]):
+            print(f"Info - Skipped '{bucket_name}/{key}'. {schema_name}.{table_name} already holds the newer file '{load_marker['key']}'.")
+            record_stage_in_run_ledger(s3, bucket_name, file_metadata, "insert_data_into_redshift", key, started_at, None, byte_count, 204,
+                                       run_ledger_folder_name)
+            return {
+                "statusCode": 204,
+                "body": f"File {bucket_name}/{key} skipped. {schema_name}.{table_name} already holds the newer file '{load_marker['key']}'."
+            }
+
         # Copy data from S3 to Redshift
         copy_query = f"""
             -- Truncate the table before loading new data
@@ -39,14 +93,21 @@ def lambda_handler(event, context):
 
         secret_arn = os.environ['secret_arn']
         execute_redshift_query(copy_query, client, redshift_workgroup_name, database_name, secret_arn)
+        save_load_marker(s3, bucket_name, table_name, key, file_metadata["landed-at"], load_marker_folder_name)
+        record_stage_in_run_ledger(s3, bucket_name, file_metadata, "insert_data_into_redshift", key, started_at, expected_row_count, byte_count, 200,
+                                   run_ledger_folder_name)
 
         return {
             "statusCode": 200,
-            "body": f"File content from {bucket_name}/{key} copied to Redshift processed successfully."
+            "body": f"File content from {bucket_name}/{key} copied to Redshift processed successfully.",
+            "expected_row_count": expected_row_count
         }
 
     except Exception as e:
         print(f"Load data to Redshift failed. An unexpected error occurred: {e}.")
+        if file_metadata is not None:
+            record_stage_in_run_ledger(s3, bucket_name, file_metadata, "insert_data_into_redshift", key, started_at, None, byte_count, 500,
+                                       run_ledger_folder_name)
         return {
             'statusCode': 500,
             'body': f"Load data to Redshift failed. An unexpected error occurred: {e}."
@@ -1,4 +1,9 @@
 import os
+import re
+import json
+import uuid
+from botocore.exceptions import ClientError
+from datetime import datetime, timezone
 
 def extract_bucket_and_key(event):
     """
@@ -16,6 +21,13 @@ def extract_bucket_and_key(event):
     except Exception as e:
         raise ValueError(f"Unable to retrieve file in S3: {e}")
     
+def get_load_key(key):
+    """
+    Returns the key of the validated file a file belongs to. Rows that pass reprocessing are saved next to their
+    validated file as '<validated_key>.reprocessed-<timestamp>' and are loaded together with it.
+    """
+    return key.split(".reprocessed-")[0]
+
 def get_table_name_from_file(key):
     """
     If the file contains 'mom', use the 'crispr_mom_mock' table.
@@ -29,6 +41,128 @@ def get_table_name_from_file(key):
     else:
         return None
     
+def fetch_column_statistics_from_s3(s3, bucket_name, key, validated_folder="3-data-element-validated-zone/", statistics_folder="column-statistics/"):
+    """
+    Fetches the column statistics sidecar written by data element validation for a validated file.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key (path) of the validated file.
+        validated_folder (str, optional): The data element validated folder. Defaults to "3-data-element-validated-zone/".
+        statistics_folder (str, optional): The folder holding the sidecars. Defaults to "column-statistics/".
+
+    Returns:
+        dict: The parsed column statistics if available; None otherwise.
+    """
+    statistics_key = f"{os.path.splitext(key.replace(validated_folder, statistics_folder))[0]}.stats.json"
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=statistics_key)
+        return json.loads(response["Body"].read().decode("utf-8"))
+    except ClientError as e:
+        # Files validated before statistics were introduced have no sidecar
+        if e.response['Error']['Code'] == 'NoSuchKey':
+            print(f"No column statistics available at '{bucket_name}/{statistics_key}'.")
+        else:
+            print(f"Error - Unable to retrieve column statistics '{bucket_name}/{statistics_key}': {e}")
+        return None
+
+# The newest file loaded into each table is recorded so that re-validated or reprocessed older files do not replace it
+def fetch_load_marker(s3, bucket_name, table_name, marker_folder="load-markers/"):
+    """
+    Fetches the load marker of a table - the key and landing time of the file it was last loaded from.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        table_name (str): The table loaded by the file.
+        marker_folder (str, optional): The folder where load markers are saved. Defaults to "load-markers/".
+
+    Returns:
+        dict: The load marker with 'key' and 'landed_at' if the table was loaded before; None otherwise.
+    """
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=f"{marker_folder}{table_name}.json")
+        return json.loads(response["Body"].read().decode("utf-8"))
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'NoSuchKey':
+            return None
+        raise
+
+def save_load_marker(s3, bucket_name, table_name, key, landed_at, marker_folder="load-markers/"):
+    """
+    Records the file a table was loaded from.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        table_name (str): The table loaded by the file.
+        key (str): The key (path) of the loaded file.
+        landed_at (str): When the loaded file landed (ISO 8601, see get_file_metadata).
+        marker_folder (str, optional): The folder where load markers are saved. Defaults to "load-markers/".
+    """
+    marker = {"key": key, "landed_at": landed_at, "loaded_at": datetime.now(timezone.utc).isoformat()}
+    s3.put_object(Bucket=bucket_name, Key=f"{marker_folder}{table_name}.json", Body=json.dumps(marker).encode('utf-8'),
+                  ContentType='application/json')
+
+def is_superseded(load_marker, key, landed_at):
+    """
+    Checks whether a file is older than the file its table was last loaded from.
+    A file landing again in the validated zone (after re-validation or reprocessing) only reloads the table if it is
+    the file the table was loaded from, or a newer one.
+
+    Args:
+        load_marker (dict): The load marker of the table (see fetch_load_marker), or None.
+        key (str): The key (path) of the file to load.
+        landed_at (str): When the file to load landed (ISO 8601, see get_file_metadata).
+
+    Returns:
+        bool: True if a newer file was already loaded into the table; False otherwise.
+    """
+    if load_marker is None or load_marker["key"] == key:
+        return False
+    return datetime.fromisoformat(landed_at) < datetime.fromisoformat(load_marker["landed_at"])
+
+def get_partition_from_key(key, validated_folder="3-data-element-validated-zone/"):
+    """
+    Extracts the dataset/load date partition of a validated file from its key
+    (e.g. 3-data-element-validated-zone/dataset=MOE/load_date=2024-05-01/agency/MOE_file.csv).
+
+    Args:
+        key (str): The key (path) of the validated file.
+        validated_folder (str, optional): The data element validated folder. Defaults to "3-data-element-validated-zone/".
+
+    Returns:
+        tuple: The dataset, the load date and the S3 prefix of the partition.
+    """
+    match = re.search(r"dataset=([^/]+)/load_date=([^/]+)/", key)
+    if match is None:
+        raise ValueError(f"File '{key}' is not in a dataset/load_date partition and cannot be registered on an external table.")
+    dataset, load_date = match.groups()
+    return dataset, load_date, f"{validated_folder}dataset={dataset}/load_date={load_date}/"
+
+def build_add_partition_query(external_schema_name, table_name, bucket_name, key):
+    """
+    Builds the query registering the partition of a validated file on its external (Redshift Spectrum) table.
+    Spectrum reads every file under the partition location at query time, so nothing is copied into Redshift.
+
+    Args:
+        external_schema_name (str): The external schema holding the table.
+        table_name (str): The external table.
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key (path) of the validated file.
+
+    Returns:
+        str: The ALTER TABLE ... ADD PARTITION query.
+    """
+    dataset, load_date, partition_prefix = get_partition_from_key(key)
+    return f"""
+            -- Register the partition of the validated file (no-op if it is already registered)
+            ALTER TABLE {external_schema_name}.{table_name}
+            ADD IF NOT EXISTS PARTITION (dataset='{dataset}', load_date='{load_date}')
+            LOCATION 's3://{bucket_name}/{partition_prefix}';
+        """
+
 def execute_redshift_query(query, client, redshift_workgroup_name, database_name, secret_arn):
     """
     Executes a SQL query using the Redshift Data API.
@@ -51,4 +185,62 @@ def execute_redshift_query(query, client, redshift_workgroup_name, database_name
             error_message = client.describe_statement(Id=statement_id)['Error']
             print(f"Error - Query failed with message: {error_message}")
             raise Exception(f"Query failed: {status}")
-        
\ No newline at end of file
+        
+
+# Correlation ID is assigned when a file lands and follows the file through the pipeline as object metadata
+def get_file_metadata(s3, bucket_name, key):
+    """
+    Retrieves the pipeline metadata of a file, assigning a correlation ID if the file does not have one yet.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key (path) of the S3 object.
+
+    Returns:
+        tuple: A tuple containing the object metadata (with 'correlation-id' and 'landed-at') and the object size in bytes.
+    """
+    response = s3.head_object(Bucket=bucket_name, Key=key)
+    metadata = dict(response.get("Metadata", {}))
+    metadata.setdefault("correlation-id", uuid.uuid4().hex)
+    metadata.setdefault("landed-at", response["LastModified"].astimezone(timezone.utc).isoformat())
+    return metadata, response["ContentLength"]
+
+# Each stage writes its own ledger entry under the file's correlation ID - stages never overwrite each other
+def record_stage_in_run_ledger(s3, bucket_name, metadata, stage, key, started_at, row_count, byte_count, status_code,
+                               ledger_folder="run-ledgers/"):
+    """
+    Uploads the timings and volumes of a pipeline stage to the run ledger of a file.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        metadata (dict): The pipeline metadata of the file (see get_file_metadata).
+        stage (str): The name of the pipeline stage.
+        key (str): The key (path) of the file processed by the stage.
+        started_at (datetime): When the stage started (timezone aware).
+        row_count (int): The number of rows processed by the stage.
+        byte_count (int): The number of bytes processed by the stage.
+        status_code (int): The status code returned by the stage.
+        ledger_folder (str, optional): The folder where run ledgers are saved. Defaults to "run-ledgers/".
+
+    Returns:
+        str: The key (path) of the uploaded ledger entry in S3.
+    """
+    ended_at = datetime.now(timezone.utc)
+    entry = {
+        "correlation_id": metadata["correlation-id"],
+        "landed_at": metadata.get("landed-at"),
+        "dataset_name_prefix": key.split('/')[-1].split('_')[0],
+        "stage": stage,
+        "key": key,
+        "started_at": started_at.isoformat(),
+        "ended_at": ended_at.isoformat(),
+        "duration_ms": round((ended_at - started_at).total_seconds() * 1000, 3),
+        "row_count": row_count,
+        "byte_count": byte_count,
+        "status_code": status_code
+    }
+    ledger_key = f"{ledger_folder}{metadata['correlation-id']}/{started_at.strftime('%Y%m%dT%H%M%S%f')}_{stage}.json"
+    s3.put_object(Bucket=bucket_name, Key=ledger_key, Body=json.dumps(entry).encode('utf-8'), ContentType='application/json')
+    return ledger_key
@@ -0,0 +1,44 @@
+import numpy as np
+
+# ========================================================
+# Bitmap Functions
+# ========================================================
+
+# Run-length encoding of per-rule results - failures are sparse so most files compress to a handful of runs
+def encode_bitmap(mask):
+    """
+    Compresses a boolean mask into alternating run lengths.
+
+    Args:
+        mask (numpy.ndarray or pandas.Series): Boolean mask where True marks a row that failed a rule.
+
+    Returns:
+        dict: The mask length and the run lengths, starting with a run of False values (which may be 0).
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if len(mask) == 0:
+        return {"length": 0, "runs": []}
+    # Positions where the value changes mark the end of a run
+    change_points = np.flatnonzero(mask[1:] != mask[:-1]) + 1
+    boundaries = np.concatenate(([0], change_points, [len(mask)]))
+    runs = np.diff(boundaries).tolist()
+    if mask[0]:
+        runs = [0] + runs
+    return {"length": int(len(mask)), "runs": runs}
+
+def decode_bitmap(bitmap: dict):
+    """
+    Expands run lengths produced by encode_bitmap back into a boolean mask.
+
+    Args:
+        bitmap (dict): The encoded bitmap with 'length' and 'runs' keys.
+
+    Returns:
+        numpy.ndarray: The boolean mask where True marks a row that failed a rule.
+    """
+    runs = bitmap["runs"]
+    values = np.arange(len(runs)) % 2 == 1
+    mask = np.repeat(values, runs)
+    if len(mask) != bitmap["length"]:
+        raise ValueError(f"Corrupted bitmap - expected {bitmap['length']} rows, decoded {len(mask)}.")
+    return mask
@@ -1,10 +1,13 @@
 # Import functions from utility_function.py and validation_function.py
 from utility_function import *
 from validation_function import *
+from statistics_function import compute_dataset_statistics, merge_dataset_statistics
 
 # Import other necessary python libraries
 import boto3
 from io import StringIO
+from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
 
 # Initialize S3 client and global configuration
@@ -24,7 +27,14 @@ def set_globals():
             "rejected_folder_name": "rejected-files/",
             "log_folder_name": "error-reports/",
             "file_validation_folder_name": "2-file-validated-zone/",
-            "data_element_validation_folder_name": "3-data-element-validated-zone/"
+            "data_element_validation_folder_name": "3-data-element-validated-zone/",
+            "statistics_folder_name": "column-statistics/",
+            "rule_results_folder_name": "rule-results/",
+            # Failing rows of partially validated files, and corrected versions of them sent back by agencies
+            "quarantine_folder_name": "quarantine/",
+            "reprocess_folder_name": "reprocess-zone/",
+            "archived_folder_name": "archived-files/",
+            "run_ledger_folder_name": "run-ledgers/"
         }
         print("Info - Global configuration initialized.")
 
@@ -35,6 +45,7 @@ def set_globals():
 def lambda_handler(event, context):
     try:
         print("Info - Starting Data Element Validation..")
+        started_at = datetime.now(timezone.utc)
         # Initialize and set global variables
         error_log = StringIO()
         set_globals()
@@ -49,6 +60,8 @@ def lambda_handler(event, context):
                 "body": (f"File not found or unable to load file content.")
             }
         print(f"Info - Sucessfully retrieved file content from '{bucket_name}/{key}'.")
+        # Correlation ID assigned at landing is carried over to the files written by this stage
+        file_metadata, byte_count = get_file_metadata(s3, bucket_name, key)
 
         # Fetch validation rule json configuration file
         dataset_name_prefix = key.split('/')[-1].split('_')[0]
@@ -65,41 +78,74 @@ def lambda_handler(event, context):
             }
         print(f"Info - Sucessfully retrieved data configuration file '{bucket_name}/{json_file_key}'.")
 
+        # Check row rule expressions against the configured columns before any data is validated
+        try:
+            compile_row_rules(validation_rules)
+        except ValueError as e:
+            return {
+                "statusCode": 400,
+                "body": f"Invalid data configuration file '{bucket_name}/{json_file_key}'. {e}"
+            }
+
         # Load defined data type dictionary and set as DataFrame schema
         dtype_dict = {col: rule["validate_data_type"] for col, rule in validation_rules["data_validation"].items()}
         df = pd.read_csv(StringIO(file_content), dtype=dtype_dict)
 
         # Validate the data
-        validated_data, error_log = validate_dataset(df, validation_rules, error_log)
+        validated_data, error_log, column_statistics, rule_results = validate_dataset(df, validation_rules, error_log)
 
         # Set keys to move datasets to
-        validated_key = key.replace(global_config['file_validation_folder_name'], global_config['data_element_validation_folder_name'])
+        # Validated files are partitioned by dataset and load date (dataset=<prefix>/load_date=<yyyy-mm-dd>/)
+        validated_key = get_partitioned_key(key, global_config['file_validation_folder_name'], global_config['data_element_validation_folder_name'], dataset_name_prefix)
         rejected_key = key.replace(global_config['file_validation_folder_name'], global_config['rejected_folder_name'])
+        quarantine_key = get_sidecar_key(key, global_config['file_validation_folder_name'], global_config['quarantine_folder_name'], ".quarantine.csv")
+
+        # Cache per-rule results so a change in the data configuration file only re-runs the rules that changed
+        rule_results_key = get_sidecar_key(key, global_config['file_validation_folder_name'], global_config['rule_results_folder_name'], ".rules.json")
+        file_keys = {
+            "source_key": rejected_key if bool(error_log.getvalue()) else validated_key,
+            "validated_key": validated_key,
+            "rejected_key": rejected_key,
+            "row_count": len(df)
+        }
 
         # If there are errors, log it into error-reports folder
         if bool(error_log.getvalue()):
             log_key = log_error_to_s3(s3, bucket_name, key, error_log, global_config['log_folder_name'])
             # If we allow partial dataset to flow through the pipeline, save only succesful rows to data element validated zone.
-            # Original dataset will still be moved to rejected - because our error report goes by rows of the original dataset.
+            # Only the failing rows (with their original row numbers) are kept in quarantine - the original file is not stored twice.
             if global_config['full_or_partial'] == "partial":
-                move_file_in_s3(s3, bucket_name, key, rejected_key)
-                save_file_in_s3(s3, bucket_name, validated_key, validated_data.to_csv(index=False))
-                print(f"Data Element Validation passed partially. Error report available at '{bucket_name}/{log_key}'. Partial file moved to '{bucket_name}/{validated_key}'")
+                file_keys = get_partial_file_keys(file_keys, quarantine_key)
+                save_rule_results_to_s3(s3, bucket_name, rule_results_key, rule_results, file_keys)
+                save_partial_output(bucket_name, df, combine_rule_results(rule_results, len(df)), file_keys, column_statistics, file_metadata)
+                s3.delete_object(Bucket=bucket_name, Key=key)
+                record_stage_in_run_ledger(s3, bucket_name, file_metadata, "validate_data_element", key, started_at, len(df), byte_count, 201,
+                                           global_config['run_ledger_folder_name'])
+                print(f"Data Element Validation passed partially. Error report available at '{bucket_name}/{log_key}'. Partial file moved to '{bucket_name}/{validated_key}'. Failing rows quarantined at '{bucket_name}/{quarantine_key}'.")
                 return {
                     "statusCode": 201,
-                    "body": f"Data Element Validation passed partially. Error report available at '{bucket_name}/{log_key}'. Partial file moved to '{bucket_name}/{validated_key}'."
+                    "body": f"Data Element Validation passed partially. Error report available at '{bucket_name}/{log_key}'. Partial file moved to '{bucket_name}/{validated_key}'. Failing rows quarantined at '{bucket_name}/{quarantine_key}'."
                 }
             # Else, we move the entire dataset to rejected folder
             else:
-                move_file_in_s3(s3, bucket_name, key, rejected_key)
+                save_rule_results_to_s3(s3, bucket_name, rule_results_key, rule_results, file_keys)
+                move_file_in_s3(s3, bucket_name, key, rejected_key, file_metadata)
+                record_stage_in_run_ledger(s3, bucket_name, file_metadata, "validate_data_element", key, started_at, len(df), byte_count, 400,
+                                           global_config['run_ledger_folder_name'])
                 print(f"Data Element Validation failed. Error report available at '{bucket_name}/{log_key}'. File moved to '{bucket_name}/{rejected_key}'.")
                 return {
                     "statusCode": 400,
                     "body": f"Data Element Validation failed. Error report available at '{bucket_name}/{log_key}'. File moved to '{bucket_name}/{rejected_key}'. "
                 }
-            
+
         # If file success then move file to data element validated zone
-        move_file_in_s3(s3, bucket_name, key, validated_key)
+        save_rule_results_to_s3(s3, bucket_name, rule_results_key, rule_results, file_keys)
+        statistics_key = save_statistics_to_s3(s3, bucket_name, validated_key, column_statistics,
+                                               global_config['data_element_validation_folder_name'], global_config['statistics_folder_name'])
+        print(f"Info - Column statistics saved to '{bucket_name}/{statistics_key}'.")
+        move_file_in_s3(s3, bucket_name, key, validated_key, file_metadata)
+        record_stage_in_run_ledger(s3, bucket_name, file_metadata, "validate_data_element", key, started_at, len(df), byte_count, 200,
+                                   global_config['run_ledger_folder_name'])
         print(f"Data Element Validation passed. File moved to {global_config['data_element_validation_folder_name']}.")
         return {
             "statusCode": 200,
@@ -110,9 +156,348 @@ def lambda_handler(event, context):
         # Log the errors as a txt file in S3 and move dataset to rejected folder
         rejected_key = key.replace(global_config['file_validation_folder_name'], global_config['rejected_folder_name'])
         rejected_key = move_file_in_s3(s3, bucket_name, key, rejected_key)
-        
+
         print(f"File Validation failed. An unexpected error occurred: {e}.")
         return {
             'statusCode': 500,
             'body': f"File Validation failed. An unexpected error occurred: {e}."
         }
+
+# ========================================================
+# Partial Output Functions
+# ========================================================
+
+# A partially validated file is split into the passing rows (validated zone) and the failing rows (quarantine).
+# Rows are numbered by their position in the original file; the validated file holds every row that is not
+# quarantined in original order. Rows that pass reprocessing are saved to separate files next to it (reprocessed_keys),
+# their row numbers are tracked in appended_row_numbers in the same order.
+def get_partial_file_keys(file_keys: dict, quarantine_key: str):
+    """
+    Builds the file keys of a partially validated file.
+
+    Args:
+        file_keys (dict): The file keys with 'validated_key', 'rejected_key' and 'row_count'.
+        quarantine_key (str): The key (path) of the quarantine file.
+
+    Returns:
+        dict: The file keys, with the validated file as source and no appended rows.
+    """
+    return {**file_keys, "source_key": file_keys["validated_key"], "quarantine_key": quarantine_key, "reprocessed_keys": [], "appended_row_numbers": []}
+
+def save_partial_output(bucket_name: str, df, invalid_mask, file_keys: dict, column_statistics: dict = None, metadata: dict = None):
+    """
+    Saves the passing rows to the data element validated zone and the failing rows to quarantine.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        df (pandas.DataFrame): The full original dataset.
+        invalid_mask (numpy.ndarray): A boolean array where True marks a row that failed at least one rule.
+        file_keys (dict): The file keys of the partially validated file (see get_partial_file_keys).
+        column_statistics (dict, optional): The column statistics of the passing rows. Computed if not given.
+        metadata (dict, optional): Object metadata of the validated file (e.g. the correlation ID). Defaults to None.
+    """
+    validated_data = df[~invalid_mask]
+    if column_statistics is None:
+        column_statistics = compute_dataset_statistics(validated_data, validated_data.columns, len(df))
+
+    if invalid_mask.any():
+        save_quarantine_to_s3(s3, bucket_name, file_keys["quarantine_key"], df[invalid_mask])
+    else:
+        s3.delete_object(Bucket=bucket_name, Key=file_keys["quarantine_key"])
+    # Statistics sidecar is written first so it is available once the validated file triggers the load
+    save_statistics_to_s3(s3, bucket_name, file_keys["validated_key"], column_statistics,
+                          global_config['data_element_validation_folder_name'], global_config['statistics_folder_name'])
+    save_file_in_s3(s3, bucket_name, file_keys["validated_key"], validated_data.to_csv(index=False), metadata)
+
+def load_source_file(bucket_name: str, file_keys: dict, dtype_dict: dict, columns: list = None):
+    """
+    Loads the original rows of a file, rebuilding them from the validated and quarantine files if it was partially validated.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        file_keys (dict): The file keys stored in the rule results sidecar.
+        dtype_dict (dict): The data type of each column.
+        columns (list, optional): The columns to load. Defaults to all columns.
+
+    Returns:
+        pandas.DataFrame: The original rows, indexed by their row number in the original file.
+    """
+    dtype_dict = {column: dtype for column, dtype in dtype_dict.items() if columns is None or column in columns}
+    file_content = fetch_file_from_s3(s3, bucket_name, file_keys["source_key"])
+    if file_content is None:
+        raise ValueError(f"Unable to load source file '{bucket_name}/{file_keys['source_key']}'")
+    df = pd.read_csv(StringIO(file_content), usecols=columns, dtype=dtype_dict)
+    if "quarantine_key" not in file_keys:
+        return df
+
+    # Rows that passed reprocessing, in the order they were appended
+    for reprocessed_key in file_keys.get("reprocessed_keys", []):
+        reprocessed_content = fetch_file_from_s3(s3, bucket_name, reprocessed_key)
+        if reprocessed_content is None:
+            raise ValueError(f"Unable to load reprocessed rows '{bucket_name}/{reprocessed_key}'")
+        df = pd.concat([df, pd.read_csv(StringIO(reprocessed_content), usecols=columns, dtype=dtype_dict)], ignore_index=True)
+
+    quarantine = fetch_quarantine_from_s3(s3, bucket_name, file_keys["quarantine_key"], dtype_dict, columns)
+    appended_row_numbers = np.asarray(file_keys.get("appended_row_numbers", []), dtype=np.int64)
+    base_row_numbers = np.setdiff1d(np.arange(file_keys["row_count"]), np.union1d(quarantine.index, appended_row_numbers))
+    df.index = np.concatenate([base_row_numbers, appended_row_numbers])
+    return pd.concat([df, quarantine[df.columns]]).sort_index()
+
+# ========================================================
+# Incremental Re-validation Function
+# ========================================================
+
+def revalidate_handler(event, context):
+    try:
+        print("Info - Starting Incremental Re-validation..")
+        set_globals()
+
+        # Triggered by an upload to the data configuration folder - the event key is the new data configuration file
+        bucket_name, json_file_key = extract_bucket_and_key(event)
+        validation_rules = fetch_data_config_from_s3(s3, bucket_name, json_file_key)
+        if validation_rules is None:
+            return {
+                "statusCode": 400,
+                "body": f"Unable to retrieve data configuration file '{bucket_name}/{json_file_key}'."
+            }
+        print(f"Info - Sucessfully retrieved data configuration file '{bucket_name}/{json_file_key}'.")
+
+        # Check row rule expressions against the configured columns before any file is re-validated
+        try:
+            compile_row_rules(validation_rules)
+        except ValueError as e:
+            return {
+                "statusCode": 400,
+                "body": f"Invalid data configuration file '{bucket_name}/{json_file_key}'. {e}"
+            }
+
+        # Only files of the same dataset are affected by the data configuration file
+        dataset_name_prefix = json_file_key.split('/')[-1].split('_')[0]
+        rule_results_keys = [
+            rule_results_key for rule_results_key in list_files_in_s3(s3, bucket_name, global_config['rule_results_folder_name'])
+            if rule_results_key.split('/')[-1].split('_')[0] == dataset_name_prefix
+        ]
+
+        outcomes = {}
+        for rule_results_key in rule_results_keys:
+            # A failure on one file should not stop the remaining files from being re-validated
+            try:
+                outcomes[rule_results_key] = revalidate_file(bucket_name, rule_results_key, validation_rules)
+            except Exception as e:
+                print(f"Error - Re-validation of '{bucket_name}/{rule_results_key}' failed: {e}.")
+                outcomes[rule_results_key] = "error"
+            print(f"Info - '{bucket_name}/{rule_results_key}': {outcomes[rule_results_key]}.")
+
+        failed_count = list(outcomes.values()).count("error")
+        withdrawn_count = list(outcomes.values()).count("withdrawn")
+        return {
+            "statusCode": 500 if failed_count else 200,
+            "body": (f"Re-validation of {len(outcomes)} '{dataset_name_prefix}' file(s) completed with {failed_count} error(s). "
+                     f"{withdrawn_count} previously accepted file(s) are now rejected - rows loaded from them remain in the warehouse."),
+            "outcomes": outcomes
+        }
+
+    except Exception as e:
+        print(f"Re-validation failed. An unexpected error occurred: {e}.")
+        return {
+            'statusCode': 500,
+            'body': f"Re-validation failed. An unexpected error occurred: {e}."
+        }
+
+def revalidate_file(bucket_name: str, rule_results_key: str, validation_rules: dict):
+    """
+    Re-validates a single file against a changed data configuration file using its cached rule results.
+    Only added or changed rules are evaluated, on only the columns they reference.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        rule_results_key (str): The key (path) of the rule results sidecar of the file.
+        validation_rules (dict): The new data configuration file.
+
+    Returns:
+        str: The outcome of the re-validation ("unchanged", "passed", "partial", "failed", or "withdrawn" for a file that was
+             accepted before and is now rejected).
+    """
+    file_keys, cached_results = fetch_rule_results_from_s3(s3, bucket_name, rule_results_key)
+    data_validation = validation_rules["data_validation"]
+    dtype_dict = {col: rule["validate_data_type"] for col, rule in data_validation.items()}
+    rule_index = build_rule_index(validation_rules)
+    added_rule_keys, removed_rule_keys = diff_rule_index(cached_results, rule_index)
+    if not added_rule_keys and not removed_rule_keys:
+        return "unchanged"
+    started_at = datetime.now(timezone.utc)
+    # Rewritten files keep the correlation ID and landing time of the file they replace
+    file_metadata, byte_count = get_file_metadata(s3, bucket_name, file_keys["source_key"])
+    print(f"Info - '{bucket_name}/{file_keys['source_key']}': {len(added_rule_keys)} rule(s) to evaluate, {len(removed_rule_keys)} rule(s) removed.")
+
+    # Evaluate the added/changed rules, reading only the columns they reference
+    new_results = {}
+    if added_rule_keys:
+        affected_columns = list(dict.fromkeys(column for rule_key in added_rule_keys for column in get_rule_columns(rule_index[rule_key])))
+        df = load_source_file(bucket_name, file_keys, dtype_dict, affected_columns)
+        new_results = evaluate_rules(df, {rule_key: rule_index[rule_key] for rule_key in added_rule_keys}, StringIO())
+
+    # Recompute the accept/reject outcome from the cached and new bitmaps
+    row_count = file_keys["row_count"]
+    rule_results = {rule_key: new_results.get(rule_key) or cached_results[rule_key] for rule_key in rule_index}
+    previous_invalid_mask = combine_rule_results(cached_results, row_count)
+    invalid_mask = combine_rule_results(rule_results, row_count)
+    partial = global_config['full_or_partial'] == "partial"
+    partial_layout = "quarantine_key" in file_keys
+
+    source_key, validated_key, rejected_key = file_keys["source_key"], file_keys["validated_key"], file_keys["rejected_key"]
+    statistics_key = get_sidecar_key(validated_key, global_config['data_element_validation_folder_name'], global_config['statistics_folder_name'], ".stats.json")
+    # Only report failures that differ from the ones already reported for this file
+    if invalid_mask.any() and not np.array_equal(invalid_mask, previous_invalid_mask):
+        error_log = write_error_report(rule_results, StringIO())
+        log_key = log_error_to_s3(s3, bucket_name, validated_key, error_log, global_config['log_folder_name'])
+        print(f"Info - Error report available at '{bucket_name}/{log_key}'.")
+
+    if partial and (invalid_mask.any() or partial_layout):
+        # Passing rows have changed - rebuild the partial file and the quarantine file
+        if not partial_layout or not np.array_equal(invalid_mask, previous_invalid_mask):
+            df = load_source_file(bucket_name, file_keys, dtype_dict)
+            quarantine_key = file_keys.get("quarantine_key") or get_sidecar_key(
+                rule_results_key[:-len(".rules.json")], global_config['rule_results_folder_name'], global_config['quarantine_folder_name'], ".quarantine.csv")
+            reprocessed_keys = file_keys.get("reprocessed_keys", [])
+            file_keys = get_partial_file_keys(file_keys, quarantine_key)
+            # Reprocessed rows are rebuilt into the validated file - removed first so a load never picks them up twice
+            for reprocessed_key in reprocessed_keys:
+                s3.delete_object(Bucket=bucket_name, Key=reprocessed_key)
+            save_partial_output(bucket_name, df, invalid_mask, file_keys, metadata=file_metadata)
+            if source_key == rejected_key:
+                s3.delete_object(Bucket=bucket_name, Key=rejected_key)
+        outcome = "partial" if invalid_mask.any() else "passed"
+    else:
+        target_key = rejected_key if invalid_mask.any() else validated_key
+        if partial_layout:
+            # Full mode needs the original file back in one piece
+            df = load_source_file(bucket_name, file_keys, dtype_dict)
+            if target_key == validated_key:
+                save_statistics_to_s3(s3, bucket_name, validated_key, compute_dataset_statistics(df, data_validation, len(df)),
+                                      global_config['data_element_validation_folder_name'], global_config['statistics_folder_name'])
+            for reprocessed_key in file_keys.get("reprocessed_keys", []):
+                s3.delete_object(Bucket=bucket_name, Key=reprocessed_key)
+            save_file_in_s3(s3, bucket_name, target_key, df.to_csv(index=False), file_metadata)
+            s3.delete_object(Bucket=bucket_name, Key=file_keys["quarantine_key"])
+        elif source_key != target_key:
+            if target_key == validated_key:
+                df = load_source_file(bucket_name, file_keys, dtype_dict)
+                save_statistics_to_s3(s3, bucket_name, validated_key, compute_dataset_statistics(df, data_validation, len(df)),
+                                      global_config['data_element_validation_folder_name'], global_config['statistics_folder_name'])
+            move_file_in_s3(s3, bucket_name, source_key, target_key, file_metadata)
+        if target_key == rejected_key:
+            s3.delete_object(Bucket=bucket_name, Key=statistics_key)
+            if partial_layout:
+                s3.delete_object(Bucket=bucket_name, Key=validated_key)
+        file_keys = {"source_key": target_key, "validated_key": validated_key, "rejected_key": rejected_key, "row_count": row_count}
+        outcome = "failed" if invalid_mask.any() else "passed"
+        # Rejecting a file does not unload it - rows copied from it stay in the warehouse until a newer file is loaded
+        if target_key == rejected_key and source_key == validated_key:
+            print(f"Warning - '{bucket_name}/{validated_key}' was accepted before and is now rejected. "
+                  f"Rows loaded from it remain in the warehouse until a newer file is loaded.")
+            outcome = "withdrawn"
+
+    save_rule_results_to_s3(s3, bucket_name, rule_results_key, rule_results, file_keys)
+    # Re-validation starts a new run of the file - the loads it triggers are measured from here, not from landing
+    status_code = {"passed": 200, "partial": 201}.get(outcome, 400)
+    record_stage_in_run_ledger(s3, bucket_name, file_metadata, "revalidate_data_element", validated_key, started_at, row_count, byte_count,
+                               status_code, global_config['run_ledger_folder_name'])
+    return outcome
+
+# ========================================================
+# Row-level Reprocessing Function
+# ========================================================
+
+def reprocess_handler(event, context):
+    try:
+        print("Info - Starting Row-level Reprocessing..")
+        started_at = datetime.now(timezone.utc)
+        error_log = StringIO()
+        set_globals()
+
+        # Triggered by a corrected quarantine file uploaded to the reprocess zone (same path as in the quarantine folder)
+        bucket_name, key = extract_bucket_and_key(event)
+        if not key.endswith(".quarantine.csv"):
+            return {
+                "statusCode": 400,
+                "body": f"'{bucket_name}/{key}' is not a quarantine file."
+            }
+        rule_results_key = get_sidecar_key(key[:-len(".quarantine.csv")], global_config['reprocess_folder_name'],
+                                           global_config['rule_results_folder_name'], ".rules.json")
+        file_keys, rule_results = fetch_rule_results_from_s3(s3, bucket_name, rule_results_key)
+        if "quarantine_key" not in file_keys:
+            return {
+                "statusCode": 400,
+                "body": f"No partially validated file found for '{bucket_name}/{key}'."
+            }
+        # Reprocessed rows keep the correlation ID and landing time of their validated file
+        file_metadata, _ = get_file_metadata(s3, bucket_name, file_keys["validated_key"])
+        _, byte_count = get_file_metadata(s3, bucket_name, key)
+
+        # Rows are validated with the rules the cached results were computed with, keeping the bitmaps consistent
+        dtype_dict = {rule["column"]: rule["data_type"] for rule in rule_results.values() if rule["column"] is not None and rule["data_type"]}
+        quarantine = fetch_quarantine_from_s3(s3, bucket_name, file_keys["quarantine_key"], dtype_dict)
+        corrected = fetch_quarantine_from_s3(s3, bucket_name, key, dtype_dict)
+        corrected = corrected[~corrected.index.duplicated(keep="last")]
+        unknown_rows = corrected.index.difference(quarantine.index)
+        for row_number in unknown_rows:
+            error_log.write(f"Row {row_number} is not quarantined and was ignored.\n")
+        corrected = corrected.drop(index=unknown_rows)
+        print(f"Info - Reprocessing {len(corrected)} corrected row(s) of '{bucket_name}/{file_keys['validated_key']}'.")
+
+        rule_index = {rule_key: {name: value for name, value in rule.items() if name != "invalid_mask"} for rule_key, rule in rule_results.items()}
+        corrected_results = evaluate_rules(corrected, rule_index, error_log)
+        invalid_mask = combine_rule_results(corrected_results, len(corrected))
+        row_numbers = corrected.index.to_numpy(dtype=np.int64)
+        for rule_key, result in corrected_results.items():
+            rule_results[rule_key]["invalid_mask"][row_numbers] = result["invalid_mask"]
+        passed, still_failing = corrected[~invalid_mask], corrected[invalid_mask]
+
+        # Save the rows that now pass next to the validated file - the validated file itself is not read or rewritten
+        if len(passed):
+            validated_key = file_keys["validated_key"]
+            reprocessed_key = get_reprocessed_key(validated_key)
+            column_statistics = fetch_statistics_from_s3(s3, bucket_name, validated_key,
+                                                         global_config['data_element_validation_folder_name'], global_config['statistics_folder_name'])
+            if column_statistics is not None:
+                save_statistics_to_s3(s3, bucket_name, validated_key, merge_dataset_statistics(column_statistics, passed),
+                                      global_config['data_element_validation_folder_name'], global_config['statistics_folder_name'])
+            save_file_in_s3(s3, bucket_name, reprocessed_key, passed[quarantine.columns].to_csv(index=False),
+                            file_metadata)
+            file_keys["reprocessed_keys"] = file_keys.get("reprocessed_keys", []) + [reprocessed_key]
+            file_keys["appended_row_numbers"] = file_keys.get("appended_row_numbers", []) + row_numbers[~invalid_mask].tolist()
+
+        # Rows that still fail replace their previous version in quarantine
+        remaining = pd.concat([quarantine.drop(index=corrected.index), still_failing]).sort_index()
+        if len(remaining):
+            save_quarantine_to_s3(s3, bucket_name, file_keys["quarantine_key"], remaining)
+        else:
+            s3.delete_object(Bucket=bucket_name, Key=file_keys["quarantine_key"])
+        save_rule_results_to_s3(s3, bucket_name, rule_results_key, rule_results, file_keys)
+
+        # Archive the corrected file so it is not reprocessed again
+        move_file_in_s3(s3, bucket_name, key, key.replace(global_config['reprocess_folder_name'], global_config['archived_folder_name']))
+        # Reprocessing starts a new run of the file - the load it triggers is measured from here, not from landing
+        record_stage_in_run_ledger(s3, bucket_name, file_metadata, "reprocess_data_element", file_keys["validated_key"], started_at, len(corrected),
+                                   byte_count, 201 if bool(error_log.getvalue()) else 200, global_config['run_ledger_folder_name'])
+
+        if bool(error_log.getvalue()):
+            log_key = log_error_to_s3(s3, bucket_name, file_keys["validated_key"], error_log, global_config['log_folder_name'])
+            print(f"Reprocessing passed partially. {len(passed)} row(s) appended, {len(remaining)} row(s) remain quarantined. Error report available at '{bucket_name}/{log_key}'.")
+            return {
+                "statusCode": 201,
+                "body": f"Reprocessing passed partially. {len(passed)} row(s) appended, {len(remaining)} row(s) remain quarantined. Error report available at '{bucket_name}/{log_key}'."
+            }
+        print(f"Reprocessing passed. {len(passed)} row(s) appended to '{bucket_name}/{file_keys['validated_key']}'.")
+        return {
+            "statusCode": 200,
+            "body": f"Reprocessing passed. {len(passed)} row(s) appended to '{bucket_name}/{file_keys['validated_key']}'."
+        }
+
+    except Exception as e:
+        print(f"Reprocessing failed. An unexpected error occurred: {e}.")
+        return {
+            'statusCode': 500,
+            'body': f"Reprocessing failed. An unexpected error occurred: {e}."
+        }
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+# ========================================================
+# Column Statistics Functions
+# ========================================================
+
+# Number of bits used to pick a HyperLogLog register (2^12 = 4096 registers, ~1.6% standard error)
+HLL_PRECISION = 12
+HISTOGRAM_BINS = 10
+
+def compute_dataset_statistics(df, columns, input_row_count: int):
+    """
+    Computes the column statistics sidecar content for a validated dataset.
+
+    Args:
+        df (pandas.DataFrame): The rows that passed validation.
+        columns (iterable): The columns to profile.
+        input_row_count (int): The number of rows before invalid rows were dropped.
+
+    Returns:
+        dict: Row counts of the dataset and the statistics of each column.
+    """
+    return {
+        "row_count": len(df),
+        "input_row_count": input_row_count,
+        "columns": {column: compute_column_statistics(df[column]) for column in columns if column in df.columns}
+    }
+
+def merge_dataset_statistics(statistics: dict, df):
+    """
+    Adds rows appended to a validated dataset to its existing column statistics without re-reading the dataset.
+
+    Args:
+        statistics (dict): The existing column statistics, as returned by compute_dataset_statistics.
+        df (pandas.DataFrame): The appended rows.
+
+    Returns:
+        dict: The updated column statistics.
+    """
+    return {
+        **statistics,
+        "row_count": statistics["row_count"] + len(df),
+        "columns": {
+            column: merge_column_statistics(column_statistics, df[column]) if column in df.columns else column_statistics
+            for column, column_statistics in statistics["columns"].items()
+        }
+    }
+
+def merge_column_statistics(statistics: dict, series):
+    """
+    Adds appended values to the existing statistics of a column.
+    Counts, nulls and min/max are exact. The distinct count becomes an upper bound (HyperLogLog registers are not
+    kept in the sidecar) and appended values are binned into the existing histogram bins.
+
+    Args:
+        statistics (dict): The existing statistics of the column, as returned by compute_column_statistics.
+        series (pandas.Series): The appended values of the column.
+
+    Returns:
+        dict: The updated statistics of the column.
+    """
+    appended = compute_column_statistics(series)
+    count = statistics["count"] + appended["count"]
+    null_count = statistics["null_count"] + appended["null_count"]
+    merged = {
+        **statistics,
+        "count": count,
+        "null_count": null_count,
+        "null_rate": round(null_count / (count + null_count), 6) if count + null_count else 0.0,
+        "min": min((value for value in (statistics["min"], appended["min"]) if value is not None), default=None),
+        "max": max((value for value in (statistics["max"], appended["max"]) if value is not None), default=None),
+        "distinct_count_approx": min(count, statistics["distinct_count_approx"] + appended["distinct_count_approx"]),
+    }
+
+    histogram = statistics["histogram"]
+    if histogram is None:
+        merged["histogram"] = appended["histogram"]
+    elif appended["count"]:
+        values = series.dropna()
+        values = values.astype("float64") if histogram["basis"] == "value" else values.astype(str).str.len().astype("float64")
+        # Values outside the existing range are counted in the first/last bin
+        edges = histogram["bin_edges"]
+        counts, _ = np.histogram(np.clip(values.to_numpy(), edges[0], edges[-1]), bins=edges)
+        merged["histogram"] = {**histogram, "counts": [int(old + new) for old, new in zip(histogram["counts"], counts)]}
+    return merged
+
+def compute_column_statistics(series):
+    """
+    Computes summary statistics for a single column using vectorized operations.
+
+    Args:
+        series (pandas.Series): The column to profile.
+
+    Returns:
+        dict: Row count, null count/rate, min/max, approximate distinct count and a histogram of the column.
+    """
+    row_count = len(series)
+    values = series.dropna()
+    null_count = row_count - len(values)
+    is_numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+    statistics = {
+        "dtype": str(series.dtype),
+        "count": len(values),
+        "null_count": null_count,
+        "null_rate": round(null_count / row_count, 6) if row_count else 0.0,
+        "min": to_json_value(values.min()) if len(values) else None,
+        "max": to_json_value(values.max()) if len(values) else None,
+        "distinct_count_approx": estimate_distinct_count(values),
+    }
+    # Numeric columns are binned by value, other columns by string length (useful for VARCHAR sizing)
+    if is_numeric:
+        statistics["histogram"] = compute_histogram(values.astype("float64"), "value")
+    else:
+        statistics["histogram"] = compute_histogram(values.astype(str).str.len().astype("float64"), "length")
+    return statistics
+
+def estimate_distinct_count(values, precision: int = HLL_PRECISION):
+    """
+    Estimates the number of distinct values in a column with HyperLogLog.
+
+    Args:
+        values (pandas.Series): The non-null values of the column.
+        precision (int, optional): Number of hash bits used to select a register. Defaults to HLL_PRECISION.
+
+    Returns:
+        int: The approximate number of distinct values.
+    """
+    if len(values) == 0:
+        return 0
+    register_count = 1 << precision
+    # 64-bit hash per value, computed in a single vectorized call
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+    register_index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    remaining_bits = hashes & np.uint64((1 << (64 - precision)) - 1)
+    # Rank is the position of the leftmost 1-bit in the remaining bits (frexp exponent == bit length)
+    _, bit_length = np.frexp(remaining_bits.astype(np.float64))
+    rank = (64 - precision) - bit_length + 1
+
+    registers = np.zeros(register_count, dtype=np.int64)
+    np.maximum.at(registers, register_index, rank)
+
+    alpha = 0.7213 / (1 + 1.079 / register_count)
+    estimate = alpha * register_count ** 2 / np.sum(np.power(2.0, -registers))
+    empty_registers = int(np.count_nonzero(registers == 0))
+    # Small range correction - fall back to linear counting
+    if estimate <= 2.5 * register_count and empty_registers:
+        estimate = register_count * np.log(register_count / empty_registers)
+    return int(round(estimate))
+
+def compute_histogram(values, basis: str, bins: int = HISTOGRAM_BINS):
+    """
+    Computes an equi-width histogram for a numeric series.
+
+    Args:
+        values (pandas.Series): The non-null numeric values to bin.
+        basis (str): What the histogram is computed over ("value" or "length").
+        bins (int, optional): The number of bins. Defaults to HISTOGRAM_BINS.
+
+    Returns:
+        dict: The histogram basis, bin edges and counts per bin; None if there are no values.
+    """
+    if len(values) == 0:
+        return None
+    counts, bin_edges = np.histogram(values.to_numpy(), bins=bins)
+    return {
+        "basis": basis,
+        "bin_edges": [round(float(edge), 6) for edge in bin_edges],
+        "counts": [int(count) for count in counts]
+    }
+
+def to_json_value(value):
+    """
+    Converts numpy/pandas scalars to native Python types so they can be serialized to JSON.
+
+    Args:
+        value (any): The scalar to convert.
+
+    Returns:
+        any: The equivalent native Python value.
+    """
+    if hasattr(value, "item"):
+        return value.item()
+    return value
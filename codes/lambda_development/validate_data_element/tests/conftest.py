@@ -0,0 +1,66 @@
+import os
+import sys
+
+# Lambda modules import each other as top-level modules (as they are packaged in the deployment zip)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+from datetime import datetime, timezone
+
+import pytest
+from botocore.exceptions import ClientError
+
+class FakeS3:
+    """In-memory stand-in for the subset of the S3 client used by the Lambda functions."""
+
+    def __init__(self):
+        self.objects = {}
+        self.metadata = {}
+        self.content_types = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, Metadata=None):
+        self.objects[Key] = Body.encode("utf-8") if isinstance(Body, str) else Body
+        self.metadata[Key] = dict(Metadata or {})
+        self.content_types[Key] = ContentType or "binary/octet-stream"
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key]), "Metadata": self.metadata[Key]}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"Metadata": self.metadata[Key], "ContentType": self.content_types[Key], "ContentLength": len(self.objects[Key]),
+                "LastModified": datetime.now(timezone.utc)}
+
+    def copy_object(self, Bucket, CopySource, Key, ContentType=None, Metadata=None, MetadataDirective="COPY"):
+        # Like S3, REPLACE resets both the user metadata and the content type
+        replace = MetadataDirective == "REPLACE"
+        self.objects[Key] = self.objects[CopySource["Key"]]
+        self.metadata[Key] = dict(Metadata or {}) if replace else dict(self.metadata[CopySource["Key"]])
+        self.content_types[Key] = (ContentType or "binary/octet-stream") if replace else self.content_types[CopySource["Key"]]
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+        self.metadata.pop(Key, None)
+        self.content_types.pop(Key, None)
+
+    def get_paginator(self, name):
+        objects = self.objects
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                yield {"Contents": [{"Key": key} for key in sorted(objects) if key.startswith(Prefix)]}
+        return Paginator()
+
+def s3_event(key, bucket_name="bucket"):
+    return {"Records": [{"s3": {"bucket": {"name": bucket_name}, "object": {"key": key}}}]}
+
+@pytest.fixture
+def s3(monkeypatch):
+    import lambda_function
+    fake_s3 = FakeS3()
+    monkeypatch.setattr(lambda_function, "s3", fake_s3)
+    lambda_function.set_globals()
+    return fake_s3
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from bitmap_function import decode_bitmap, encode_bitmap
+
+@pytest.mark.parametrize("mask", [
+    [],
+    [False],
+    [True],
+    [False, False, True, True, False],
+    [True, True, False, True],
+    [True] * 5,
+])
+def test_round_trip(mask):
+    bitmap = encode_bitmap(np.array(mask, dtype=bool))
+    assert bitmap["length"] == len(mask)
+    np.testing.assert_array_equal(decode_bitmap(bitmap), np.array(mask, dtype=bool))
+
+def test_runs_start_with_false_run():
+    assert encode_bitmap(np.array([True, False, False]))["runs"] == [0, 1, 2]
+    assert encode_bitmap(np.array([False, True]))["runs"] == [1, 1]
+
+def test_round_trip_large_sparse_mask():
+    mask = np.zeros(100_000, dtype=bool)
+    mask[[0, 17, 18, 99_999]] = True
+    bitmap = encode_bitmap(mask)
+    assert bitmap["runs"] == [0, 1, 16, 2, 99_980, 1]
+    np.testing.assert_array_equal(decode_bitmap(bitmap), mask)
+
+def test_decode_rejects_corrupted_bitmap():
+    with pytest.raises(ValueError):
+        decode_bitmap({"length": 10, "runs": [3, 2]})
@@ -0,0 +1,156 @@
+import json
+from io import StringIO
+
+import pandas as pd
+import pytest
+
+import lambda_function
+from conftest import s3_event
+
+BUCKET = "bucket"
+LANDED_KEY = "2-file-validated-zone/agency1/MOE_Primary_2024.csv"
+RULE_RESULTS_KEY = "rule-results/agency1/MOE_Primary_2024.rules.json"
+QUARANTINE_KEY = "quarantine/agency1/MOE_Primary_2024.quarantine.csv"
+REPROCESS_KEY = "reprocess-zone/agency1/MOE_Primary_2024.quarantine.csv"
+CONFIG_KEY = "data-configuration-files/MOE_data_configuration_file.json"
+CONFIG = {
+    "column_names": ["NRIC", "Level", "Absences"],
+    "data_validation": {
+        "NRIC": {"validate_data_type": "string", "validate_mandatory": ""},
+        "Level": {"validate_data_type": "int64", "validate_range": {"min": 1, "max": 6}},
+        "Absences": {"validate_data_type": "int64", "validate_range": {"min": 0, "max": 365}}
+    }
+}
+METADATA = {"correlation-id": "0123456789abcdef", "landed-at": "2024-05-01T01:00:00+00:00"}
+DTYPES = {column: rule["validate_data_type"] for column, rule in CONFIG["data_validation"].items()}
+# Rows 1, 3 and 4 fail the Level range
+ORIGINAL = pd.DataFrame({
+    "NRIC": [f"S000000{i}A" for i in range(6)],
+    "Level": [1, 9, 2, 0, 7, 6],
+    "Absences": [3, 4, 5, 6, 7, 8]
+})
+
+@pytest.fixture
+def partial_file(s3, monkeypatch):
+    """Validates ORIGINAL in partial mode and returns the rule results sidecar."""
+    monkeypatch.setitem(lambda_function.global_config, "full_or_partial", "partial")
+    s3.put_object(Bucket=BUCKET, Key=CONFIG_KEY, Body=json.dumps(CONFIG))
+    s3.put_object(Bucket=BUCKET, Key=LANDED_KEY, Body=ORIGINAL.to_csv(index=False), Metadata=METADATA)
+    assert lambda_function.lambda_handler(s3_event(LANDED_KEY, BUCKET), None)["statusCode"] == 201
+    return s3
+
+def get_file_keys(s3):
+    return lambda_function.fetch_rule_results_from_s3(s3, BUCKET, RULE_RESULTS_KEY)[0]
+
+def reprocess(s3, corrections: dict):
+    """Uploads a corrected quarantine file with the given {row_number: Level} corrections and reprocesses it."""
+    quarantine = pd.read_csv(StringIO(s3.objects[QUARANTINE_KEY].decode("utf-8")), index_col="row_number")
+    corrected = quarantine.loc[list(corrections)].assign(Level=pd.Series(corrections))
+    s3.put_object(Bucket=BUCKET, Key=REPROCESS_KEY, Body=corrected.to_csv(index_label="row_number"))
+    return lambda_function.reprocess_handler(s3_event(REPROCESS_KEY, BUCKET), None)
+
+def test_partial_validation_splits_rows(partial_file):
+    file_keys = get_file_keys(partial_file)
+    validated = pd.read_csv(StringIO(partial_file.objects[file_keys["validated_key"]].decode("utf-8")))
+    assert validated["NRIC"].tolist() == ORIGINAL["NRIC"][[0, 2, 5]].tolist()
+    quarantine = pd.read_csv(StringIO(partial_file.objects[QUARANTINE_KEY].decode("utf-8")), index_col="row_number")
+    assert quarantine.index.tolist() == [1, 3, 4]
+
+def test_reprocess_saves_passing_rows_next_to_validated_file(partial_file):
+    file_keys = get_file_keys(partial_file)
+    validated_content = partial_file.objects[file_keys["validated_key"]]
+    assert reprocess(partial_file, {4: 5, 1: 2})["statusCode"] == 200
+
+    file_keys = get_file_keys(partial_file)
+    assert partial_file.objects[file_keys["validated_key"]] == validated_content
+    assert len(file_keys["reprocessed_keys"]) == 1
+    assert file_keys["reprocessed_keys"][0].startswith(f"{file_keys['validated_key']}.reprocessed-")
+    reprocessed = pd.read_csv(StringIO(partial_file.objects[file_keys["reprocessed_keys"][0]].decode("utf-8")))
+    # Rows keep the order of the corrected file, appended_row_numbers records it
+    assert reprocessed["NRIC"].tolist() == ["S0000004A", "S0000001A"]
+    assert file_keys["appended_row_numbers"] == [4, 1]
+
+def test_load_source_file_rebuilds_original_row_order_after_reprocess(partial_file):
+    reprocess(partial_file, {4: 5})
+    reprocess(partial_file, {1: 2, 3: 7})
+
+    source = lambda_function.load_source_file(BUCKET, get_file_keys(partial_file), DTYPES)
+    expected = ORIGINAL.assign(Level=[1, 2, 2, 7, 5, 6])
+    assert source.index.tolist() == list(range(len(ORIGINAL)))
+    assert source["NRIC"].tolist() == expected["NRIC"].tolist()
+    assert source["Level"].tolist() == expected["Level"].tolist()
+
+def test_load_source_file_keeps_dtypes_once_quarantine_is_empty(partial_file):
+    reprocess(partial_file, {1: 2, 3: 3, 4: 5})
+    assert QUARANTINE_KEY not in partial_file.objects
+
+    source = lambda_function.load_source_file(BUCKET, get_file_keys(partial_file), DTYPES)
+    assert source["Level"].tolist() == [1, 2, 2, 3, 5, 6]
+    assert source["Level"].dtype == "int64" and source["Absences"].dtype == "int64"
+
+def test_revalidate_after_reprocess_rebuilds_validated_file_in_original_order(partial_file):
+    reprocess(partial_file, {4: 5})
+    reprocessed_keys = get_file_keys(partial_file)["reprocessed_keys"]
+
+    # Relaxing the Level range lets row 1 (Level 9) through; row 3 (Level 0) still fails
+    config = json.loads(json.dumps(CONFIG))
+    config["data_validation"]["Level"]["validate_range"]["max"] = 9
+    partial_file.put_object(Bucket=BUCKET, Key=CONFIG_KEY, Body=json.dumps(config))
+    response = lambda_function.revalidate_handler(s3_event(CONFIG_KEY, BUCKET), None)
+    assert response["outcomes"] == {RULE_RESULTS_KEY: "partial"}
+
+    file_keys = get_file_keys(partial_file)
+    assert file_keys["reprocessed_keys"] == [] and file_keys["appended_row_numbers"] == []
+    assert not any(key in partial_file.objects for key in reprocessed_keys)
+    validated = pd.read_csv(StringIO(partial_file.objects[file_keys["validated_key"]].decode("utf-8")))
+    assert validated["NRIC"].tolist() == ORIGINAL["NRIC"][[0, 1, 2, 4, 5]].tolist()
+    assert validated["Level"].tolist() == [1, 9, 2, 5, 6]
+
+def test_rewrites_keep_correlation_id_and_landing_time(partial_file):
+    file_keys = get_file_keys(partial_file)
+    assert partial_file.metadata[file_keys["validated_key"]] == METADATA
+
+    reprocess(partial_file, {4: 5})
+    assert partial_file.metadata[get_file_keys(partial_file)["reprocessed_keys"][0]] == METADATA
+
+    config = json.loads(json.dumps(CONFIG))
+    config["data_validation"]["Level"]["validate_range"]["max"] = 9
+    partial_file.put_object(Bucket=BUCKET, Key=CONFIG_KEY, Body=json.dumps(config))
+    lambda_function.revalidate_handler(s3_event(CONFIG_KEY, BUCKET), None)
+    assert partial_file.metadata[file_keys["validated_key"]] == METADATA
+
+    # Both reruns are recorded in the run ledger of the file
+    ledger = [json.loads(partial_file.objects[key]) for key in partial_file.objects if key.startswith(f"run-ledgers/{METADATA['correlation-id']}/")]
+    assert sorted(entry["stage"] for entry in ledger) == ["reprocess_data_element", "revalidate_data_element", "validate_data_element"]
+    assert {entry["landed_at"] for entry in ledger} == {METADATA["landed-at"]}
+
+def test_revalidate_reports_previously_accepted_file_that_is_now_rejected(s3):
+    s3.put_object(Bucket=BUCKET, Key=CONFIG_KEY, Body=json.dumps(CONFIG))
+    passing = ORIGINAL.assign(Level=[1, 2, 3, 4, 5, 6])
+    s3.put_object(Bucket=BUCKET, Key=LANDED_KEY, Body=passing.to_csv(index=False), Metadata=METADATA)
+    assert lambda_function.lambda_handler(s3_event(LANDED_KEY, BUCKET), None)["statusCode"] == 200
+    validated_key = get_file_keys(s3)["validated_key"]
+
+    config = json.loads(json.dumps(CONFIG))
+    config["data_validation"]["Level"]["validate_range"]["max"] = 4
+    s3.put_object(Bucket=BUCKET, Key=CONFIG_KEY, Body=json.dumps(config))
+    response = lambda_function.revalidate_handler(s3_event(CONFIG_KEY, BUCKET), None)
+    assert response["outcomes"] == {RULE_RESULTS_KEY: "withdrawn"}
+    assert "1 previously accepted file(s) are now rejected" in response["body"]
+    assert validated_key not in s3.objects
+    assert get_file_keys(s3)["source_key"] == "rejected-files/agency1/MOE_Primary_2024.csv"
+
+def test_move_keeps_content_type_when_replacing_metadata(s3):
+    s3.put_object(Bucket=BUCKET, Key=LANDED_KEY, Body="NRIC\n", ContentType="text/csv")
+    lambda_function.move_file_in_s3(s3, BUCKET, LANDED_KEY, "rejected-files/agency1/MOE_Primary_2024.csv", METADATA)
+    assert s3.content_types["rejected-files/agency1/MOE_Primary_2024.csv"] == "text/csv"
+    assert s3.metadata["rejected-files/agency1/MOE_Primary_2024.csv"] == METADATA
+
+def test_invalid_row_rule_is_rejected_before_validation(s3):
+    config = {**CONFIG, "row_validation": {"validate_absences_by_level": "Absences <= 190 if Level < 4 else Absences <= 200"}}
+    s3.put_object(Bucket=BUCKET, Key=CONFIG_KEY, Body=json.dumps(config))
+    s3.put_object(Bucket=BUCKET, Key=LANDED_KEY, Body=ORIGINAL.to_csv(index=False), Metadata=METADATA)
+
+    assert lambda_function.lambda_handler(s3_event(LANDED_KEY, BUCKET), None)["statusCode"] == 400
+    assert LANDED_KEY in s3.objects
+    assert lambda_function.revalidate_handler(s3_event(CONFIG_KEY, BUCKET), None)["statusCode"] == 400
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from statistics_function import compute_column_statistics, estimate_distinct_count, merge_column_statistics
+
+def test_estimate_distinct_count_empty():
+    assert estimate_distinct_count(pd.Series([], dtype="int64")) == 0
+
+def test_estimate_distinct_count_small_cardinality_is_close_to_exact():
+    values = pd.Series(np.tile(np.arange(100), 50))
+    assert abs(estimate_distinct_count(values) - 100) <= 2
+
+def test_estimate_distinct_count_large_cardinality_within_error():
+    values = pd.Series([f"S{i:07d}" for i in range(50_000)])
+    assert abs(estimate_distinct_count(values) - 50_000) / 50_000 < 0.05
+
+def test_compute_column_statistics_numeric():
+    statistics = compute_column_statistics(pd.Series([1, 5, None, 10], dtype="Int64"))
+    assert (statistics["count"], statistics["null_count"], statistics["null_rate"]) == (3, 1, 0.25)
+    assert (statistics["min"], statistics["max"]) == (1, 10)
+    assert statistics["histogram"]["basis"] == "value"
+    assert sum(statistics["histogram"]["counts"]) == 3
+
+def test_compute_column_statistics_string_uses_length_histogram():
+    statistics = compute_column_statistics(pd.Series(["a", "abc", None], dtype="string"))
+    assert statistics["histogram"]["basis"] == "length"
+    assert statistics["histogram"]["bin_edges"][0] == 1.0 and statistics["histogram"]["bin_edges"][-1] == 3.0
+
+def test_merge_column_statistics_keeps_exact_counts_and_bins():
+    statistics = compute_column_statistics(pd.Series([1, 2, 3, 4], dtype="Int64"))
+    merged = merge_column_statistics(statistics, pd.Series([0, 9, None], dtype="Int64"))
+    assert (merged["count"], merged["null_count"], merged["min"], merged["max"]) == (6, 1, 0, 9)
+    assert merged["histogram"]["bin_edges"] == statistics["histogram"]["bin_edges"]
+    assert sum(merged["histogram"]["counts"]) == 6
@@ -0,0 +1,59 @@
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from validation_function import compile_row_rules, parse_row_expression, validate_row
+
+COLUMNS = ["NRIC", "Primary School", "Level", "Absences", "Science_Grade"]
+DTYPES = {"NRIC": "string", "Primary School": "string", "Level": "int64", "Absences": "int64", "Science_Grade": "float64"}
+
+def test_parse_row_expression_returns_referenced_columns_in_order():
+    assert parse_row_expression("rule", "Level >= 3 or Science_Grade != Science_Grade", COLUMNS) == ["Level", "Science_Grade"]
+
+def test_parse_row_expression_accepts_backtick_quoted_columns():
+    assert parse_row_expression("rule", "`Primary School` != 'Closed' and Absences < 100", COLUMNS) == ["Primary School", "Absences"]
+
+@pytest.mark.parametrize("expression", [
+    "Level >= @minimum",
+    "Salary > 0",
+    "`Primary Schol` == 'A'",
+    "1 == 1",
+    "Level >=",
+    None,
+])
+def test_parse_row_expression_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        parse_row_expression("rule", expression, COLUMNS)
+
+@pytest.mark.parametrize("expression", [
+    "Absences <= 190 if Level < 4 else Absences <= 200",
+    "Absences - 190",
+    "`Primary School` + 'x'",
+])
+def test_parse_row_expression_rejects_expressions_pandas_cannot_evaluate_to_pass_fail(expression):
+    with pytest.raises(ValueError):
+        parse_row_expression("rule", expression, COLUMNS, DTYPES)
+
+def test_parse_row_expression_accepts_boolean_expressions_on_typed_columns():
+    assert parse_row_expression("rule", "`Primary School` != 'Closed' or Level >= 3", COLUMNS, DTYPES) == ["Primary School", "Level"]
+
+def test_compile_row_rules_rejects_expression_at_config_load():
+    config = {
+        "column_names": COLUMNS,
+        "data_validation": {column: {"validate_data_type": dtype} for column, dtype in DTYPES.items()},
+        "row_validation": {"validate_absences_by_level": "Absences <= 190 if Level < 4 else Absences <= 200"}
+    }
+    with pytest.raises(ValueError, match="validate_absences_by_level"):
+        compile_row_rules(config)
+
+def test_compile_row_rules_without_row_validation():
+    assert compile_row_rules({"column_names": COLUMNS, "data_validation": {}}) == {}
+
+def test_validate_row_fails_rows_that_cannot_be_confirmed():
+    df = pd.DataFrame({"Level": [1, 4, 2, 5], "Science_Grade": [np.nan, 3.0, 6.0, np.nan]})
+    error_log = StringIO()
+    invalid = validate_row(df, "validate_science_from_primary_3", "Level >= 3 or Science_Grade != Science_Grade", error_log)
+    assert invalid.tolist() == [False, False, True, False]
+    assert error_log.getvalue() == "Row 2 failed validate_science_from_primary_3 row validation (Level >= 3 or Science_Grade != Science_Grade).\n"
@@ -1,8 +1,12 @@
 import json
 from botocore.exceptions import ClientError
-from datetime import datetime
+from datetime import datetime, timezone
 import pytz
 import os
+import uuid
+from io import StringIO
+import pandas as pd
+from bitmap_function import encode_bitmap, decode_bitmap
 
 # ========================================================
 # Utility Functions
@@ -79,7 +83,7 @@ def fetch_data_config_from_s3(s3, bucket_name: str, key: str):
         return None
 
 # Save files in S3 using put and then deleting the previous file - Used when new file content is different
-def save_file_in_s3(s3, bucket_name: str, new_key: str, content):
+def save_file_in_s3(s3, bucket_name: str, new_key: str, content, metadata: dict = None):
     """
     Saves content to an S3 bucket under the specified key.
 
@@ -88,11 +92,12 @@ def save_file_in_s3(s3, bucket_name: str, new_key: str, content):
         bucket_name (str): The name of the S3 bucket.
         new_key (str): The key (path) under which the file should be saved.
         content (str): The content to be saved to the S3 object.
+        metadata (dict, optional): Object metadata to set on the new object (e.g. the correlation ID). Defaults to None.
     """
-    s3.put_object(Bucket=bucket_name, Key=new_key, Body=content)
+    s3.put_object(Bucket=bucket_name, Key=new_key, Body=content, Metadata=metadata or {})
 
 # Move files in S3 using S3 copy and delete - Used when new file content is the same
-def move_file_in_s3(s3, bucket_name: str, old_key: str, new_key: str):
+def move_file_in_s3(s3, bucket_name: str, old_key: str, new_key: str, metadata: dict = None):
     """
     Moves a file within an S3 bucket by copying it to a new location and deleting the old file.
 
@@ -101,8 +106,15 @@ def move_file_in_s3(s3, bucket_name: str, old_key: str, new_key: str):
         bucket_name (str): The name of the S3 bucket.
         old_key (str): The key (path) of the existing S3 object.
         new_key (str): The key (path) for the new location of the S3 object.
+        metadata (dict, optional): Object metadata to set on the new object. Defaults to keeping the existing metadata.
     """
-    s3.copy_object(Bucket=bucket_name, CopySource={'Bucket': bucket_name, 'Key': old_key}, Key=new_key)
+    if metadata is None:
+        s3.copy_object(Bucket=bucket_name, CopySource={'Bucket': bucket_name, 'Key': old_key}, Key=new_key)
+    else:
+        # REPLACE also resets the content type - carry over the content type of the existing object
+        content_type = s3.head_object(Bucket=bucket_name, Key=old_key).get("ContentType", "binary/octet-stream")
+        s3.copy_object(Bucket=bucket_name, CopySource={'Bucket': bucket_name, 'Key': old_key}, Key=new_key,
+                       ContentType=content_type, Metadata=metadata, MetadataDirective='REPLACE')
     s3.delete_object(Bucket=bucket_name, Key=old_key)
 
 # Upload error logs as a .txt file to log folder - timestamp of pipeline run will be appended at the back
@@ -129,6 +141,277 @@ def log_error_to_s3(s3, bucket_name: str, key: str, error_log, log_folder: str =
     s3.put_object(Bucket=bucket_name, Key=log_key, Body=error_log, ContentType='text/plain')
     return log_key
 
+# Validated files are laid out as Hive-style partitions so they can be registered on external tables (Redshift Spectrum)
+def get_partitioned_key(key: str, folder: str, partitioned_folder: str, dataset_name_prefix: str):
+    """
+    Derives the key of a file in a zone partitioned by dataset and load date.
+
+    Args:
+        key (str): The key (path) of the file in its current zone.
+        folder (str): The current zone folder of the file (e.g. "2-file-validated-zone/").
+        partitioned_folder (str): The partitioned zone folder (e.g. "3-data-element-validated-zone/").
+        dataset_name_prefix (str): The dataset the file belongs to (e.g. "MOE").
+
+    Returns:
+        str: The key (path) of the file under its dataset=<prefix>/load_date=<yyyy-mm-dd>/ partition.
+    """
+    load_date = datetime.now(pytz.timezone('Asia/Singapore')).strftime("%Y-%m-%d")
+    return key.replace(folder, f"{partitioned_folder}dataset={dataset_name_prefix}/load_date={load_date}/")
+
+# Rows that pass reprocessing are saved next to the validated file instead of rewriting it - loads by key prefix
+# (Redshift COPY) and by partition (Redshift Spectrum) pick them up together with the validated file
+def get_reprocessed_key(validated_key: str):
+    """
+    Derives the key of a new reprocessed rows file of a validated file.
+
+    Args:
+        validated_key (str): The key (path) of the validated file.
+
+    Returns:
+        str: The key (path) of the reprocessed rows file (e.g. "<validated_key>.reprocessed-<timestamp>").
+    """
+    timestamp = datetime.now(pytz.timezone('Asia/Singapore')).strftime("%Y%m%dT%H%M%S%f")
+    return f"{validated_key}.reprocessed-{timestamp}"
+
+# Sidecar files mirror the path of the data file under their own folder so data zones only hold data files
+def get_sidecar_key(key: str, folder: str, sidecar_folder: str, suffix: str):
+    """
+    Derives the key of a sidecar file from the key of the data file it describes.
+
+    Args:
+        key (str): The key (path) of the data file.
+        folder (str): The zone folder of the data file (e.g. "3-data-element-validated-zone/").
+        sidecar_folder (str): The folder where the sidecar is stored.
+        suffix (str): The suffix replacing the file extension (e.g. ".stats.json").
+
+    Returns:
+        str: The key (path) of the sidecar file.
+    """
+    return f"{os.path.splitext(key.replace(folder, sidecar_folder))[0]}{suffix}"
+
+# Upload column statistics as a .json sidecar - mirrors the path of the validated file under the statistics folder
+def save_statistics_to_s3(s3, bucket_name: str, validated_key: str, column_statistics: dict,
+                          validated_folder: str = "3-data-element-validated-zone/", statistics_folder: str = "column-statistics/"):
+    """
+    Uploads the column statistics of a validated file as a JSON sidecar to an S3 bucket.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        validated_key (str): The key (path) of the validated file the statistics describe.
+        column_statistics (dict): The column statistics returned by validate_dataset.
+        validated_folder (str, optional): The data element validated folder. Defaults to "3-data-element-validated-zone/".
+        statistics_folder (str, optional): The folder where the sidecar should be saved. Defaults to "column-statistics/".
+
+    Returns:
+        str: The key (path) of the uploaded statistics sidecar in S3.
+    """
+    statistics_key = get_sidecar_key(validated_key, validated_folder, statistics_folder, ".stats.json")
+    sidecar = {
+        "source_key": validated_key,
+        "generated_at": datetime.now(pytz.timezone('Asia/Singapore')).isoformat(),
+        **column_statistics
+    }
+    s3.put_object(Bucket=bucket_name, Key=statistics_key, Body=json.dumps(sidecar).encode('utf-8'), ContentType='application/json')
+    return statistics_key
+
+def fetch_statistics_from_s3(s3, bucket_name: str, validated_key: str,
+                             validated_folder: str = "3-data-element-validated-zone/", statistics_folder: str = "column-statistics/"):
+    """
+    Fetches the column statistics sidecar of a validated file from an S3 bucket.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        validated_key (str): The key (path) of the validated file the statistics describe.
+        validated_folder (str, optional): The data element validated folder. Defaults to "3-data-element-validated-zone/".
+        statistics_folder (str, optional): The folder where the sidecar is saved. Defaults to "column-statistics/".
+
+    Returns:
+        dict: The column statistics (as returned by validate_dataset) if successful; None if an error occurs.
+    """
+    statistics_key = get_sidecar_key(validated_key, validated_folder, statistics_folder, ".stats.json")
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=statistics_key)
+    except ClientError as e:
+        print(f"Error - Unable to retrieve column statistics '{statistics_key}': {e}")
+        return None
+    sidecar = json.loads(response["Body"].read().decode("utf-8"))
+    sidecar.pop("source_key", None)
+    sidecar.pop("generated_at", None)
+    return sidecar
+
+# Quarantine files hold only the failing rows of a partially validated file, with their row number in the original file
+def save_quarantine_to_s3(s3, bucket_name: str, quarantine_key: str, df):
+    """
+    Uploads the failing rows of a file as a quarantine .csv file to an S3 bucket.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        quarantine_key (str): The key (path) under which the quarantine file should be saved.
+        df (pandas.DataFrame): The failing rows, indexed by their row number in the original file.
+
+    Returns:
+        str: The key (path) of the uploaded quarantine file in S3.
+    """
+    s3.put_object(Bucket=bucket_name, Key=quarantine_key, Body=df.to_csv(index_label="row_number"), ContentType='text/csv')
+    return quarantine_key
+
+def fetch_quarantine_from_s3(s3, bucket_name: str, quarantine_key: str, dtype_dict: dict, columns: list = None):
+    """
+    Fetches a quarantine .csv file (or a corrected version of it) from an S3 bucket.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        quarantine_key (str): The key (path) of the quarantine file.
+        dtype_dict (dict): The data type of each column.
+        columns (list, optional): The columns to load. Defaults to all columns.
+
+    Returns:
+        pandas.DataFrame: The quarantined rows indexed by row number; empty if the quarantine file does not exist.
+    """
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=quarantine_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'NoSuchKey':
+            raise
+        # Keep the column data types so the empty frame does not turn typed columns into objects when concatenated
+        columns = columns or list(dtype_dict)
+        return pd.DataFrame(columns=columns, index=pd.Index([], dtype="int64", name="row_number")).astype(
+            {column: dtype_dict[column] for column in columns if column in dtype_dict})
+    usecols = None if columns is None else ["row_number", *columns]
+    return pd.read_csv(StringIO(response["Body"].read().decode("utf-8")), usecols=usecols, dtype=dtype_dict, index_col="row_number")
+
+# Upload per-rule result bitmaps as a .json sidecar - used to re-validate only the rules that changed
+def save_rule_results_to_s3(s3, bucket_name: str, rule_results_key: str, rule_results: dict, file_keys: dict):
+    """
+    Uploads the per-rule results of a file as run-length encoded bitmaps to an S3 bucket.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        rule_results_key (str): The key (path) under which the sidecar should be saved.
+        rule_results (dict): The per-rule results, as returned by evaluate_rules.
+        file_keys (dict): Where the file lives - 'source_key' (full original data), 'validated_key' and 'rejected_key'.
+
+    Returns:
+        str: The key (path) of the uploaded rule results sidecar in S3.
+    """
+    sidecar = {
+        **file_keys,
+        "generated_at": datetime.now(pytz.timezone('Asia/Singapore')).isoformat(),
+        "rules": {
+            rule_key: {
+                **{name: value for name, value in result.items() if name != "invalid_mask"},
+                "invalid": encode_bitmap(result["invalid_mask"])
+            } for rule_key, result in rule_results.items()
+        }
+    }
+    s3.put_object(Bucket=bucket_name, Key=rule_results_key, Body=json.dumps(sidecar).encode('utf-8'), ContentType='application/json')
+    return rule_results_key
+
+def fetch_rule_results_from_s3(s3, bucket_name: str, rule_results_key: str):
+    """
+    Fetches a rule results sidecar from an S3 bucket and expands its bitmaps.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        rule_results_key (str): The key (path) of the rule results sidecar.
+
+    Returns:
+        tuple: A tuple containing the file keys stored in the sidecar and the per-rule results (see evaluate_rules).
+    """
+    response = s3.get_object(Bucket=bucket_name, Key=rule_results_key)
+    sidecar = json.loads(response["Body"].read().decode("utf-8"))
+    rules = sidecar.pop("rules")
+    sidecar.pop("generated_at", None)
+    rule_results = {
+        rule_key: {
+            **{name: value for name, value in rule.items() if name != "invalid"},
+            "invalid_mask": decode_bitmap(rule["invalid"])
+        } for rule_key, rule in rules.items()
+    }
+    return sidecar, rule_results
+
+def list_files_in_s3(s3, bucket_name: str, prefix: str):
+    """
+    Lists the keys of all objects under a prefix in an S3 bucket.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        prefix (str): The prefix (folder) to list.
+
+    Returns:
+        list: The keys (paths) of the objects under the prefix, excluding folder placeholders.
+    """
+    keys = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        keys.extend(obj["Key"] for obj in page.get("Contents", []) if not obj["Key"].endswith("/"))
+    return keys
+
+# Correlation ID is assigned when a file lands and follows the file through the pipeline as object metadata
+def get_file_metadata(s3, bucket_name: str, key: str):
+    """
+    Retrieves the pipeline metadata of a file, assigning a correlation ID if the file does not have one yet.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key (path) of the S3 object.
+
+    Returns:
+        tuple: A tuple containing the object metadata (with 'correlation-id' and 'landed-at') and the object size in bytes.
+    """
+    response = s3.head_object(Bucket=bucket_name, Key=key)
+    metadata = dict(response.get("Metadata", {}))
+    metadata.setdefault("correlation-id", uuid.uuid4().hex)
+    metadata.setdefault("landed-at", response["LastModified"].astimezone(timezone.utc).isoformat())
+    return metadata, response["ContentLength"]
+
+# Each stage writes its own ledger entry under the file's correlation ID - stages never overwrite each other
+def record_stage_in_run_ledger(s3, bucket_name: str, metadata: dict, stage: str, key: str, started_at, row_count: int,
+                               byte_count: int, status_code: int, ledger_folder: str = "run-ledgers/"):
+    """
+    Uploads the timings and volumes of a pipeline stage to the run ledger of a file.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        metadata (dict): The pipeline metadata of the file (see get_file_metadata).
+        stage (str): The name of the pipeline stage.
+        key (str): The key (path) of the file processed by the stage.
+        started_at (datetime): When the stage started (timezone aware).
+        row_count (int): The number of rows processed by the stage.
+        byte_count (int): The number of bytes processed by the stage.
+        status_code (int): The status code returned by the stage.
+        ledger_folder (str, optional): The folder where run ledgers are saved. Defaults to "run-ledgers/".
+
+    Returns:
+        str: The key (path) of the uploaded ledger entry in S3.
+    """
+    ended_at = datetime.now(timezone.utc)
+    entry = {
+        "correlation_id": metadata["correlation-id"],
+        "landed_at": metadata.get("landed-at"),
+        "dataset_name_prefix": key.split('/')[-1].split('_')[0],
+        "stage": stage,
+        "key": key,
+        "started_at": started_at.isoformat(),
+        "ended_at": ended_at.isoformat(),
+        "duration_ms": round((ended_at - started_at).total_seconds() * 1000, 3),
+        "row_count": row_count,
+        "byte_count": byte_count,
+        "status_code": status_code
+    }
+    ledger_key = f"{ledger_folder}{metadata['correlation-id']}/{started_at.strftime('%Y%m%dT%H%M%S%f')}_{stage}.json"
+    s3.put_object(Bucket=bucket_name, Key=ledger_key, Body=json.dumps(entry).encode('utf-8'), ContentType='application/json')
+    return ledger_key
+
 # Not currently in use (For when data type in data configuration file does not match Pandas DataFrame data types)
 def map_data_types_to_dtype(data_types: dict):
     """
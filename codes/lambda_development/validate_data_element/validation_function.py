@@ -1,9 +1,18 @@
+import ast
+import hashlib
+import json
+import re
+import numpy as np
 import pandas as pd
+from statistics_function import compute_dataset_statistics
 
 # ========================================================
 # Validation Functions
 # ========================================================
 
+# Row rules that passed compile_row_rules - keyed by expression and columns so each is only checked once per container
+row_rule_cache = {}
+
 # Using vectorized operations for optimisation (Columnar Validation)
 def validate_dataset(df, validation_rules: dict, error_log):
     """
@@ -11,26 +20,230 @@ def validate_dataset(df, validation_rules: dict, error_log):
 
     Args:
         df (pandas.DataFrame): The dataset to validate.
-        validation_rules (dict): A dictionary containing the validation rules for each column in the dataset.
+        validation_rules (dict): The data configuration file, with the validation rules for each column (data_validation)
+            and the optional cross-column rules (row_validation).
         error_log (StringIO): A file-like object to log error messages.
 
     Returns:
-        tuple: A tuple containing the cleaned DataFrame (with invalid rows dropped) and the error log.
+        tuple: A tuple containing the cleaned DataFrame (with invalid rows dropped), the error log,
+            the column statistics of the cleaned DataFrame and the per-rule results (see evaluate_rules).
+    """
+    # Go through data element validation for each column, then each row rule - results are kept per rule so they can be cached
+    rule_results = evaluate_rules(df, build_rule_index(validation_rules), error_log)
+    invalid_mask = combine_rule_results(rule_results, len(df))
+
+    # Drop invalid rows
+    input_row_count = len(df)
+    df = df[~invalid_mask]
+
+    # Profile the rows that passed validation while the data is still in memory (Column statistics sidecar)
+    column_statistics = compute_dataset_statistics(df, validation_rules["data_validation"], input_row_count)
+    return df, error_log, column_statistics, rule_results
+
+def get_rule_key(column: str, data_type: str, rule_name: str, params):
+    """
+    Hashes a rule definition so its cached result can be matched against a later data configuration file.
+
+    Args:
+        column (str): The column name the rule applies to (None for row rules).
+        data_type (str or dict): The data type the column is read as - changing it invalidates every rule on the column.
+            For row rules, the data type of each referenced column.
+        rule_name (str): The name of the validation rule.
+        params (dict or str): The parameters for the validation rule.
+
+    Returns:
+        str: A short hexadecimal hash identifying the rule.
     """
-    # Set empty list to capture error rows
-    invalid_rows = []
-    # Focus on data_validation key in the data configuration json
-    validation_rules = validation_rules["data_validation"]
+    definition = json.dumps([column, data_type, rule_name, params], sort_keys=True)
+    return hashlib.sha256(definition.encode("utf-8")).hexdigest()[:16]
 
-    # Go through data element validation for each column
-    for column, rules in validation_rules.items():
+def build_rule_index(validation_rules: dict):
+    """
+    Flattens the data_validation and row_validation sections of a data configuration file into individual rules keyed by their hash.
+
+    Args:
+        validation_rules (dict): The data configuration file.
+
+    Returns:
+        dict: Rule key mapped to a dictionary with the column, data type, rule name and parameters of the rule.
+            Row rules have no column; their parameters are the expression and 'columns' lists the columns it references.
+    """
+    rule_index = {}
+    data_validation = validation_rules["data_validation"]
+    for column, rules in data_validation.items():
+        data_type = rules.get("validate_data_type")
         for rule_name, params in rules.items():
-            invalid_mask = validate_column(df, column, rule_name, params, error_log)
-            invalid_rows.extend(df[invalid_mask].index.tolist())
+            rule_key = get_rule_key(column, data_type, rule_name, params)
+            rule_index[rule_key] = {"column": column, "data_type": data_type, "rule_name": rule_name, "params": params}
 
-    # Drop invalid rows
-    df = df.drop(index=invalid_rows)
-    return df, error_log
+    for rule_name, row_rule in compile_row_rules(validation_rules).items():
+        data_types = {column: data_validation.get(column, {}).get("validate_data_type") for column in row_rule["columns"]}
+        rule_key = get_rule_key(None, data_types, rule_name, row_rule["expression"])
+        rule_index[rule_key] = {"column": None, "data_type": data_types, "rule_name": rule_name,
+                                "params": row_rule["expression"], "columns": row_rule["columns"]}
+    return rule_index
+
+def get_rule_columns(rule: dict):
+    """
+    Lists the columns a rule needs to be evaluated.
+
+    Args:
+        rule (dict): A rule, as returned by build_rule_index.
+
+    Returns:
+        list: The referenced columns for row rules; the rule's column otherwise.
+    """
+    return rule.get("columns") or [rule["column"]]
+
+def compile_row_rules(validation_rules: dict):
+    """
+    Parses the row_validation section of a data configuration file and checks every expression against column_names.
+    Expressions use DataFrame.eval syntax and are meant for rules spanning several columns, single column bounds belong
+    in data_validation (e.g. {"row_validation": {"validate_science_from_primary_3": "Level >= 3 or Science_Grade != Science_Grade"}},
+    where "x != x" is True only for missing values); column names containing spaces are quoted with backticks.
+
+    Args:
+        validation_rules (dict): The data configuration file.
+
+    Returns:
+        dict: Row rule name mapped to its expression and the columns it references.
+
+    Raises:
+        ValueError: If an expression is invalid or references a column that is not in column_names.
+    """
+    column_names = validation_rules.get("column_names", [])
+    dtype_dict = {col: rule["validate_data_type"] for col, rule in validation_rules.get("data_validation", {}).items()}
+    row_rules = {}
+    for rule_name, expression in validation_rules.get("row_validation", {}).items():
+        cache_key = (expression, tuple(column_names), tuple(sorted(dtype_dict.items())))
+        if cache_key not in row_rule_cache:
+            row_rule_cache[cache_key] = parse_row_expression(rule_name, expression, column_names, dtype_dict)
+        row_rules[rule_name] = {"expression": expression, "columns": row_rule_cache[cache_key]}
+    return row_rules
+
+def parse_row_expression(rule_name: str, expression: str, column_names: list, dtype_dict: dict = None):
+    """
+    Parses a row rule expression and returns the columns it references.
+    The expression is also compiled with DataFrame.eval on an empty frame of the configured data types, so expressions
+    pandas cannot evaluate, or that do not produce a pass/fail result, are rejected when the configuration is loaded.
+
+    Args:
+        rule_name (str): The name of the row rule, used in error messages.
+        expression (str): The DataFrame.eval expression of the row rule.
+        column_names (list): The columns defined in the data configuration file.
+        dtype_dict (dict, optional): The data type of each column. Defaults to object columns.
+
+    Returns:
+        list: The columns referenced by the expression, in order of appearance.
+
+    Raises:
+        ValueError: If the expression is invalid, is not boolean or references a column that is not in column_names.
+    """
+    if not isinstance(expression, str) or "@" in expression:
+        raise ValueError(f"Row rule '{rule_name}' must be an expression string without local variables (@).")
+    # Backtick-quoted column names are swapped for placeholders so the expression parses as Python
+    quoted_names = re.findall(r"`([^`]*)`", expression)
+    parsable = expression
+    for position, name in enumerate(quoted_names):
+        parsable = parsable.replace(f"`{name}`", f"__column_{position}__", 1)
+    try:
+        tree = ast.parse(parsable, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Row rule '{rule_name}' is not a valid expression: {e.msg}.")
+
+    referenced = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            name = quoted_names[int(node.id[9:-2])] if re.fullmatch(r"__column_\d+__", node.id) else node.id
+            if name not in referenced:
+                referenced.append(name)
+    unknown_columns = [name for name in referenced if name not in column_names]
+    if unknown_columns:
+        raise ValueError(f"Row rule '{rule_name}' references unknown column(s) {unknown_columns}. Expected one of {column_names}.")
+    if not referenced:
+        raise ValueError(f"Row rule '{rule_name}' does not reference any column.")
+
+    dtype_dict = dtype_dict or {}
+    empty_df = pd.DataFrame({column: pd.Series(dtype=dtype_dict.get(column, "object")) for column in column_names})
+    try:
+        result = empty_df.eval(expression)
+    except Exception as e:
+        raise ValueError(f"Row rule '{rule_name}' cannot be evaluated: {e}.")
+    if not isinstance(result, pd.Series) or not pd.api.types.is_bool_dtype(result.dtype):
+        raise ValueError(f"Row rule '{rule_name}' must evaluate to True/False for each row.")
+    return referenced
+
+def diff_rule_index(cached_rule_keys, rule_index: dict):
+    """
+    Compares cached rule results against the rules of a new data configuration file.
+
+    Args:
+        cached_rule_keys (iterable): The rule keys that already have cached results.
+        rule_index (dict): The rule index built from the new data configuration file.
+
+    Returns:
+        tuple: A tuple containing the added/changed rule keys (to evaluate) and the removed rule keys (to drop).
+    """
+    cached_rule_keys = set(cached_rule_keys)
+    added_rule_keys = [rule_key for rule_key in rule_index if rule_key not in cached_rule_keys]
+    removed_rule_keys = [rule_key for rule_key in cached_rule_keys if rule_key not in rule_index]
+    return added_rule_keys, removed_rule_keys
+
+def evaluate_rules(df, rule_index: dict, error_log):
+    """
+    Evaluates each rule of a rule index against its column and logs any validation errors.
+
+    Args:
+        df (pandas.DataFrame): The dataset to validate (only the columns referenced by the rules are needed).
+        rule_index (dict): The rules to evaluate, as returned by build_rule_index.
+        error_log (StringIO): A file-like object to log error messages.
+
+    Returns:
+        dict: Rule key mapped to the rule definition plus an 'invalid_mask' boolean array of the rows that failed it.
+    """
+    rule_results = {}
+    for rule_key, rule in rule_index.items():
+        if rule["column"] is None:
+            invalid_mask = validate_row(df, rule["rule_name"], rule["params"], error_log)
+        else:
+            invalid_mask = validate_column(df, rule["column"], rule["rule_name"], rule["params"], error_log)
+        rule_results[rule_key] = {**rule, "invalid_mask": np.asarray(invalid_mask, dtype=bool)}
+    return rule_results
+
+def combine_rule_results(rule_results: dict, row_count: int):
+    """
+    Combines per-rule results into a single mask of invalid rows.
+
+    Args:
+        rule_results (dict): The per-rule results, as returned by evaluate_rules.
+        row_count (int): The number of rows in the dataset.
+
+    Returns:
+        numpy.ndarray: A boolean array where True marks a row that failed at least one rule.
+    """
+    invalid_mask = np.zeros(row_count, dtype=bool)
+    for result in rule_results.values():
+        invalid_mask |= result["invalid_mask"]
+    return invalid_mask
+
+def write_error_report(rule_results: dict, error_log):
+    """
+    Rebuilds the error report from per-rule results, in the same format as validate_column and validate_row.
+
+    Args:
+        rule_results (dict): The per-rule results, as returned by evaluate_rules.
+        error_log (StringIO): A file-like object to log error messages.
+
+    Returns:
+        StringIO: The error log.
+    """
+    for result in rule_results.values():
+        for index in np.flatnonzero(result["invalid_mask"]):
+            if result["column"] is None:
+                error_log.write(f"Row {index} failed {result['rule_name']} row validation ({result['params']}).\n")
+            else:
+                error_log.write(f"Column '{result['column']}': Row {index} failed {result['rule_name']} validation.\n")
+    return error_log
 
 def validate_column(df, column: str, rule_name: str, params: dict, error_log):
     """
@@ -59,6 +272,26 @@ def validate_column(df, column: str, rule_name: str, params: dict, error_log):
         error_log.write(f"Function {rule_name} does not exist. Please check the data configuration file.\n")
     return pd.Series([False] * len(df))
 
+def validate_row(df, rule_name: str, expression: str, error_log):
+    """
+    Validates every row of the dataset against a row rule expression and logs any validation errors.
+    The expression is evaluated on whole columns with DataFrame.eval (numexpr is used when available).
+
+    Args:
+        df (pandas.DataFrame): The dataset to validate.
+        rule_name (str): The name of the row rule.
+        expression (str): The DataFrame.eval expression rows must satisfy.
+        error_log (StringIO): A file-like object to log error messages.
+
+    Returns:
+        pandas.Series: A boolean Series indicating which rows failed the validation.
+    """
+    # Missing values compare as unknown - rows where the rule cannot be confirmed fail it
+    validation_results = ~df.eval(expression).fillna(False).astype(bool)
+    for index in df.index[validation_results.to_numpy()]:
+        error_log.write(f"Row {index} failed {rule_name} row validation ({expression}).\n")
+    return validation_results
+
 # Define validation helper functions
 def validate_data_type(value, param: str = None):
     """
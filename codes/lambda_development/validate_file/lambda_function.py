@@ -5,6 +5,7 @@ from utility_function import *
 import boto3
 import pandas as pd
 from io import StringIO
+from datetime import datetime, timezone
 
 # Initialize S3 client
 s3 = boto3.client('s3')
@@ -22,7 +23,8 @@ def set_globals():
             "error_report_folder_name": "error-reports/",
             "landing_folder_name": "1-landing-zone/",
             "file_validated_folder_name": "2-file-validated-zone/",
-            "archived_folder_name": "archived-files/"
+            "archived_folder_name": "archived-files/",
+            "run_ledger_folder_name": "run-ledgers/"
         }
         print("Info - Global configuration initialized.")
 
@@ -33,6 +35,7 @@ def set_globals():
 def lambda_handler(event, context):
     try:
         print("Info - Starting File Validation..")
+        started_at = datetime.now(timezone.utc)
         error_log = StringIO()
         set_globals()
 
@@ -60,6 +63,10 @@ def lambda_handler(event, context):
             }
         print(f"Info - Successfully retrieved file content from '{bucket_name}/{key}'.")
 
+        # --- Assign correlation ID - propagated to the next stages through object metadata ---
+        file_metadata, byte_count = get_file_metadata(s3, bucket_name, key)
+        print(f"Info - Correlation ID '{file_metadata['correlation-id']}' for '{bucket_name}/{key}'.")
+
         # --- Validate file format ---
         if not filename.endswith(validation_rules["file_type"]):
             print(f"Invalid file type - Expected {validation_rules['file_type']}.")
@@ -94,7 +101,9 @@ def lambda_handler(event, context):
 
             # Move file to rejected folder (preserves subfolders like agency2/)
             rejected_key = key.replace(global_config['landing_folder_name'], global_config['rejected_folder_name'])
-            move_file_in_s3(s3, bucket_name, key, rejected_key)
+            move_file_in_s3(s3, bucket_name, key, rejected_key, file_metadata)
+            record_stage_in_run_ledger(s3, bucket_name, file_metadata, "validate_file", key, started_at, len(df), byte_count, 400,
+                                       global_config['run_ledger_folder_name'])
 
             return {
                 "statusCode": 400,
@@ -103,7 +112,9 @@ def lambda_handler(event, context):
 
         # --- If validation passed, move to validated folder ---
         validated_key = key.replace(global_config['landing_folder_name'], global_config['file_validated_folder_name'])
-        move_file_in_s3(s3, bucket_name, key, validated_key)
+        move_file_in_s3(s3, bucket_name, key, validated_key, file_metadata)
+        record_stage_in_run_ledger(s3, bucket_name, file_metadata, "validate_file", key, started_at, len(df), byte_count, 200,
+                                   global_config['run_ledger_folder_name'])
 
         return {
             "statusCode": 200,
@@ -1,8 +1,9 @@
 import json
 from botocore.exceptions import ClientError
-from datetime import datetime
+from datetime import datetime, timezone
 import pytz
 import os
+import uuid
 
 
 # ========================================================
@@ -84,7 +85,7 @@ def fetch_data_config_from_s3(s3, bucket_name, key):
         return None
 
 # Move files in S3 using S3 copy and delete - Used when new file content is the same
-def move_file_in_s3(s3, bucket_name, old_key, new_key):
+def move_file_in_s3(s3, bucket_name, old_key, new_key, metadata=None):
     """
     Moves a file within an S3 bucket by copying it to a new location and deleting the old file.
 
@@ -93,8 +94,15 @@ def move_file_in_s3(s3, bucket_name, old_key, new_key):
         bucket_name (str): The name of the S3 bucket.
         old_key (str): The key (path) of the existing S3 object.
         new_key (str): The key (path) for the new location of the S3 object.
+        metadata (dict, optional): Object metadata to set on the new object. Defaults to keeping the existing metadata.
     """
-    s3.copy_object(Bucket=bucket_name, CopySource={'Bucket': bucket_name, 'Key': old_key}, Key=new_key)
+    if metadata is None:
+        s3.copy_object(Bucket=bucket_name, CopySource={'Bucket': bucket_name, 'Key': old_key}, Key=new_key)
+    else:
+        # REPLACE also resets the content type - carry over the content type of the existing object
+        content_type = s3.head_object(Bucket=bucket_name, Key=old_key).get("ContentType", "binary/octet-stream")
+        s3.copy_object(Bucket=bucket_name, CopySource={'Bucket': bucket_name, 'Key': old_key}, Key=new_key,
+                       ContentType=content_type, Metadata=metadata, MetadataDirective='REPLACE')
     s3.delete_object(Bucket=bucket_name, Key=old_key)
 
 # Upload error logs as a .txt file to log folder - timestamp of pipeline run will be appended at the back
@@ -120,3 +128,61 @@ def log_error_to_s3(s3, bucket_name: str, key: str, error_log, log_folder: str =
     error_log = error_log.getvalue().encode('utf-8')
     s3.put_object(Bucket=bucket_name, Key=log_key, Body=error_log, ContentType='text/plain')
     return log_key
+
+# Correlation ID is assigned when a file lands and follows the file through the pipeline as object metadata
+def get_file_metadata(s3, bucket_name, key):
+    """
+    Retrieves the pipeline metadata of a file, assigning a correlation ID if the file does not have one yet.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key (path) of the S3 object.
+
+    Returns:
+        tuple: A tuple containing the object metadata (with 'correlation-id' and 'landed-at') and the object size in bytes.
+    """
+    response = s3.head_object(Bucket=bucket_name, Key=key)
+    metadata = dict(response.get("Metadata", {}))
+    metadata.setdefault("correlation-id", uuid.uuid4().hex)
+    metadata.setdefault("landed-at", response["LastModified"].astimezone(timezone.utc).isoformat())
+    return metadata, response["ContentLength"]
+
+# Each stage writes its own ledger entry under the file's correlation ID - stages never overwrite each other
+def record_stage_in_run_ledger(s3, bucket_name, metadata, stage, key, started_at, row_count, byte_count, status_code,
+                               ledger_folder="run-ledgers/"):
+    """
+    Uploads the timings and volumes of a pipeline stage to the run ledger of a file.
+
+    Args:
+        s3 (boto3.client): A Boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        metadata (dict): The pipeline metadata of the file (see get_file_metadata).
+        stage (str): The name of the pipeline stage.
+        key (str): The key (path) of the file processed by the stage.
+        started_at (datetime): When the stage started (timezone aware).
+        row_count (int): The number of rows processed by the stage.
+        byte_count (int): The number of bytes processed by the stage.
+        status_code (int): The status code returned by the stage.
+        ledger_folder (str, optional): The folder where run ledgers are saved. Defaults to "run-ledgers/".
+
+    Returns:
+        str: The key (path) of the uploaded ledger entry in S3.
+    """
+    ended_at = datetime.now(timezone.utc)
+    entry = {
+        "correlation_id": metadata["correlation-id"],
+        "landed_at": metadata.get("landed-at"),
+        "dataset_name_prefix": key.split('/')[-1].split('_')[0],
+        "stage": stage,
+        "key": key,
+        "started_at": started_at.isoformat(),
+        "ended_at": ended_at.isoformat(),
+        "duration_ms": round((ended_at - started_at).total_seconds() * 1000, 3),
+        "row_count": row_count,
+        "byte_count": byte_count,
+        "status_code": status_code
+    }
+    ledger_key = f"{ledger_folder}{metadata['correlation-id']}/{started_at.strftime('%Y%m%dT%H%M%S%f')}_{stage}.json"
+    s3.put_object(Bucket=bucket_name, Key=ledger_key, Body=json.dumps(entry).encode('utf-8'), ContentType='application/json')
+    return ledger_key
@@ -198,6 +198,62 @@ resource "aws_cloudwatch_log_group" "lambda-log-group-validate-data-element" {
   }
 }
 
+# Create Lambda Function for **Incremental Re-validation** (same package, triggered by data configuration file changes)
+resource "aws_lambda_function" "revalidate-data-element" {
+  function_name = "${var.admin_name}-revalidate-data-element"
+  description   = "Lambda to re-validate files against changed rules of a data configuration file"
+  role          = aws_iam_role.lambda-basic-role.arn
+  handler       = "lambda_function.revalidate_handler"
+  runtime       = "python3.13"
+  memory_size   = 256 # mb
+  timeout       = 300 # seconds
+
+  filename         = var.lambda_function_validate_data_path
+  layers           = [aws_lambda_layer_version.pandas-layer.arn]
+  source_code_hash = filebase64sha256(var.lambda_function_validate_data_path)
+
+  depends_on = [
+    aws_lambda_layer_version.pandas-layer
+  ]
+}
+
+# Create CloudWatch Log Group
+resource "aws_cloudwatch_log_group" "lambda-log-group-revalidate-data-element" {
+  name              = "/aws/lambda/${aws_lambda_function.revalidate-data-element.function_name}"
+  retention_in_days = 7
+  lifecycle {
+    prevent_destroy = false
+  }
+}
+
+# Create Lambda Function for **Row-level Reprocessing** (same package, triggered by corrected quarantine files)
+resource "aws_lambda_function" "reprocess-data-element" {
+  function_name = "${var.admin_name}-reprocess-data-element"
+  description   = "Lambda to validate corrected quarantined rows and append them to the validated file"
+  role          = aws_iam_role.lambda-basic-role.arn
+  handler       = "lambda_function.reprocess_handler"
+  runtime       = "python3.13"
+  memory_size   = 128 # mb
+  timeout       = 60  # seconds
+
+  filename         = var.lambda_function_validate_data_path
+  layers           = [aws_lambda_layer_version.pandas-layer.arn]
+  source_code_hash = filebase64sha256(var.lambda_function_validate_data_path)
+
+  depends_on = [
+    aws_lambda_layer_version.pandas-layer
+  ]
+}
+
+# Create CloudWatch Log Group
+resource "aws_cloudwatch_log_group" "lambda-log-group-reprocess-data-element" {
+  name              = "/aws/lambda/${aws_lambda_function.reprocess-data-element.function_name}"
+  retention_in_days = 7
+  lifecycle {
+    prevent_destroy = false
+  }
+}
+
 # As the next Lambda Function we are going to create needs Redshift access,
 # we are will store the credentials in secret Manager
 resource "aws_secretsmanager_secret" "lambda-redshift-secret" {
@@ -35,3 +35,32 @@ resource "aws_redshiftserverless_workgroup" "main-workgroup" {
   subnet_ids = var.redshift_subnet_ids
   publicly_accessible = false
 }
+
+# Redshift Spectrum keeps the external schema/table definitions in the Glue Data Catalog
+resource "aws_iam_policy" "redshift-glue-catalog-permissions" {
+  name        = "${var.admin_name}-redshift-glue-catalog-permissions"
+  description = "Allows Redshift Spectrum to create and read the external schema, tables and partitions in the Glue Data Catalog"
+
+  policy = jsonencode({
+    Version = "2012-10-17",
+    Statement = [
+      {
+        Effect   = "Allow",
+        Action   = [
+          "glue:GetDatabase*",
+          "glue:CreateDatabase",
+          "glue:GetTable*",
+          "glue:CreateTable",
+          "glue:GetPartition*",
+          "glue:BatchCreatePartition"
+        ],
+        Resource = "*"
+      }
+    ]
+  })
+}
+
+resource "aws_iam_role_policy_attachment" "redshift_glue_policy_attachment" {
+  role       = aws_iam_role.redshift-s3-basic-access.name
+  policy_arn = aws_iam_policy.redshift-glue-catalog-permissions.arn
+}
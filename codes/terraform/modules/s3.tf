@@ -78,3 +78,80 @@ resource "aws_s3_object" "logs" {
         aws_s3_pipeline
     ]
 }
+
+resource "aws_s3_object" "column-statistics" {
+    bucket = var.bucket_name
+    key    = "column-statistics/"
+    content = ""
+    # source = "/dev/null"
+
+    depends_on = [
+        aws_s3_pipeline
+    ]
+}
+
+resource "aws_s3_object" "rule-results" {
+    bucket = var.bucket_name
+    key    = "rule-results/"
+    content = ""
+    # source = "/dev/null"
+
+    depends_on = [
+        aws_s3_pipeline
+    ]
+}
+
+resource "aws_s3_object" "quarantine" {
+    bucket = var.bucket_name
+    key    = "quarantine/"
+    content = ""
+    # source = "/dev/null"
+
+    depends_on = [
+        aws_s3_pipeline
+    ]
+}
+
+resource "aws_s3_object" "reprocess-zone" {
+    bucket = var.bucket_name
+    key    = "reprocess-zone/"
+    content = ""
+    # source = "/dev/null"
+
+    depends_on = [
+        aws_s3_pipeline
+    ]
+}
+
+resource "aws_s3_object" "archived-files" {
+    bucket = var.bucket_name
+    key    = "archived-files/"
+    content = ""
+    # source = "/dev/null"
+
+    depends_on = [
+        aws_s3_pipeline
+    ]
+}
+
+resource "aws_s3_object" "run-ledgers" {
+    bucket = var.bucket_name
+    key    = "run-ledgers/"
+    content = ""
+    # source = "/dev/null"
+
+    depends_on = [
+        aws_s3_pipeline
+    ]
+}
+
+resource "aws_s3_object" "load-markers" {
+    bucket = var.bucket_name
+    key    = "load-markers/"
+    content = ""
+    # source = "/dev/null"
+
+    depends_on = [
+        aws_s3_pipeline
+    ]
+}